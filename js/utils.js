@@ -181,3 +181,87 @@ window.fetchWithSWR = async function(url, storageKey, renderCallback, timeEl, ti
         }
     }
 };
+
+// Apply a feed delta (feeds/*.delta.json) to the snapshot whose content hash is delta.from.
+// Section entries are either an index into the previous list (kept item) or a new item object.
+window.applyFeedDelta = function(prev, delta) {
+    const doc = JSON.parse(JSON.stringify(prev));
+    const walk = (pointer) => {
+        const keys = pointer.split('/').slice(1).map(k => k.replace(/~1/g, '/').replace(/~0/g, '~'));
+        let node = doc;
+        keys.slice(0, -1).forEach(k => { node = node[Array.isArray(node) ? Number(k) : k]; });
+        const last = keys[keys.length - 1];
+        return [node, Array.isArray(node) ? Number(last) : last];
+    };
+
+    Object.entries(delta.sections || {}).forEach(([pointer, ops]) => {
+        const [node, key] = walk(pointer);
+        const previous = node[key] || [];
+        node[key] = ops.items.map(x => (typeof x === 'number' ? previous[x] : x));
+    });
+    (delta.remove || []).forEach(pointer => {
+        const [node, key] = walk(pointer);
+        if (Array.isArray(node)) node.splice(key, 1); else delete node[key];
+    });
+    for (const [pointer, value] of Object.entries(delta.set || {})) {
+        if (pointer === '') return value;
+        const [node, key] = walk(pointer);
+        node[key] = value;
+    }
+    return doc;
+};
+
+// Rebuild the v1 shape of a v2 HuggingFace feed: id lists become model records from doc.models,
+// with counts formatted for display and a missing task falling back per doc.taskFallback.
+window.expandModelRefs = function(doc) {
+    const models = doc.models || {};
+    const toV1 = (model, key) => ({
+        ...model,
+        task: model.task || (doc.taskFallback === 'listKey' ? key : 'Unknown'),
+        likes: model.likes.toLocaleString('en-US'),
+        downloads: model.downloads.toLocaleString('en-US')
+    });
+    const expand = (value, key) => {
+        if (Array.isArray(value) && value.length && value.every(v => typeof v === 'string' && v in models)) {
+            return value.map(id => toV1(models[id], key));
+        }
+        if (value && typeof value === 'object' && !Array.isArray(value)) {
+            return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, expand(v, k)]));
+        }
+        return value;
+    };
+    const out = {};
+    Object.entries(doc).forEach(([k, v]) => {
+        if (!['models', 'taskFallback', 'schemaVersion'].includes(k)) out[k] = expand(v, k);
+    });
+    return out;
+};
+
+// Search the prebuilt index in feeds/search/ (written by scripts/fetch_all.py). Only the term
+// shards a query touches and the doc chunks of its hits are fetched. Resolves to at most
+// `limit` docs containing every query token, each as [source, label, title, url].
+window.searchFeeds = async function(query, { base = 'feeds/search/', limit = 20 } = {}) {
+    const stop = new Set('a an and are as at be by for from in is it of on or the to with'.split(' '));
+    const text = query.normalize('NFKC').toLowerCase();
+    const tokens = (text.match(/[a-z0-9]+/g) || []).filter(w => w.length > 1 && !stop.has(w));
+    (text.match(/[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]+/g) || []).forEach(run => {
+        if (run.length === 1) tokens.push(run);
+        for (let i = 0; i < run.length - 1; i++) tokens.push(run.slice(i, i + 2));
+    });
+    if (!tokens.length) return [];
+
+    const cache = window.searchFeeds.cache || (window.searchFeeds.cache = {});
+    const load = (name) => cache[base + name] || (cache[base + name] =
+        fetch(base + name).then(r => (r.ok ? r.json() : {})));
+    const index = await load('index.json');
+    const shardOf = (term) => (/^[a-z0-9]/.test(term) ? term[0] : 'u' + String(term.codePointAt(0) % index.unicodeShards).padStart(2, '0'));
+
+    let hits = null;
+    for (const token of [...new Set(tokens)]) {
+        const shard = shardOf(token);
+        const ids = new Set(index.shards.includes(shard) ? ((await load(`terms-${shard}.json`))[token] || []) : []);
+        hits = hits === null ? ids : new Set([...hits].filter(id => ids.has(id)));
+    }
+    const ids = [...hits].sort((a, b) => a - b).slice(0, limit);
+    return Promise.all(ids.map(async id => (await load(`docs-${Math.floor(id / index.docChunk)}.json`))[id]));
+};
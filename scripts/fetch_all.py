@@ -9,398 +9,2654 @@ import sys
 import json
 import time
 import re
+import asyncio
+import hashlib
+import threading
 import argparse
 import concurrent.futures
+import multiprocessing
+import tempfile
+import tracemalloc
+import unicodedata
+import gzip
+import cProfile
+import contextlib
+import pstats
+import shutil
+import signal
+import sqlite3
+import http.server
+from collections import Counter
 from datetime import datetime, date, timezone
-from typing import Dict, List, Any, Optional
-from urllib.parse import urlencode
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from urllib.parse import unquote, urlencode, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+# requests, bs4 and lxml are imported where they are first used, so targets that never
+# fetch or parse (history, serve between refreshes) do not pay for loading them
+if TYPE_CHECKING:
+    from requests.adapters import BaseAdapter
+
+try:
+    import brotli
+except ImportError:  # optional: .json.br siblings are skipped without it
+    brotli = None
 
 # --- Common Utilities ---
 
+DEFAULT_UA = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+
+# Per-host request budget: (requests per second, burst size, max in-flight requests)
+HOST_LIMITS = {
+    'github.com': (0.5, 2, 2),
+    'huggingface.co': (4.0, 6, 4),
+    'tophub.today': (1.0, 2, 2),
+    'finance.eastmoney.com': (1.0, 1, 1),
+    'aihot.virxact.com': (1.0, 1, 1),
+}
+DEFAULT_HOST_LIMIT = (1.0, 2, 2)
+
+class HostLimiter:
+    """Token bucket plus an in-flight cap for a single host."""
+    def __init__(self, rate: float, burst: int, max_in_flight: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.slots.acquire()
+        try:
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return self
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    async def __aexit__(self, *exc):
+        self.slots.release()
+
+class ResponseCache:
+    """On-disk response cache keyed by URL, revalidated with ETag/Last-Modified."""
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def store(self, url: str, headers, body: str):
+        entry = {
+            'url': url, 'storedAt': time.time(),
+            'etag': headers.get('ETag'), 'lastModified': headers.get('Last-Modified'), 'body': body
+        }
+        path = self._path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def touch(self, url: str, entry: Dict[str, Any]):
+        # A 304 restarts the TTL; rewriting also bumps mtime, which drives LRU eviction
+        self.store(url, {'ETag': entry.get('etag'), 'Last-Modified': entry.get('lastModified')}, entry['body'])
+
+    def mark_used(self, url: str):
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def report(self) -> str:
+        s = self.stats
+        return f"HTTP cache: {s['hits'] + s['revalidated']} hits ({s['revalidated']} revalidated via 304), {s['misses']} misses"
+
+def _soup(markup: str, features: str = 'lxml'):
+    """BeautifulSoup tree for the bs4 parsers; bs4 is only loaded when that backend runs."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, features)
+
+# --- Instrumentation ---
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+class RunMetrics:
+    """Per-request and per-scraper telemetry for one run, exported as JSON and Prometheus text."""
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.requests: List[Dict[str, Any]] = []
+        # scraper name -> {'status', 'error', 'wallSeconds'}
+        self.scrapers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def new_request(self, source: str, url: str) -> Dict[str, Any]:
+        return {'source': source, 'url': url, 'host': urlparse(url).hostname or '', 'status': None,
+                'cache': None, 'latencyMs': 0.0, 'bytes': 0, 'retries': 0, 'backoffSeconds': 0.0, 'error': None}
+
+    def record_request(self, info: Dict[str, Any]):
+        info['latencyMs'] = round(info['latencyMs'], 1)
+        with self._lock:
+            self.requests.append(info)
+
+    def record_scraper(self, name: str, wall: float, error: Optional[BaseException] = None):
+        self.scrapers[name] = {'status': 'error' if error else 'ok', 'error': str(error) if error else None,
+                               'wallSeconds': round(wall, 3)}
+
+    def build_report(self, engine: 'FetchEngine', target: str) -> Dict[str, Any]:
+        scrapers = {}
+        for name in sorted(set(self.scrapers) | set(engine.stats)):
+            st = engine.stats.get(name, {})
+            reqs = [r for r in self.requests if r['source'] == name]
+            scrapers[name] = {
+                **self.scrapers.get(name, {'status': 'not run', 'error': None, 'wallSeconds': None}),
+                'requests': len(reqs), 'bytes': sum(r['bytes'] for r in reqs),
+                'fetchSeconds': round(st.get('fetch', 0.0), 3), 'parseSeconds': round(st.get('parse', 0.0), 3),
+                'serializeSeconds': round(st.get('serialize', 0.0), 3),
+                'pages': int(st.get('pages', 0)), 'records': int(st.get('records', 0)),
+            }
+        hosts = {}
+        for host in sorted({r['host'] for r in self.requests}):
+            reqs = [r for r in self.requests if r['host'] == host]
+            network = [r['latencyMs'] for r in reqs if r['cache'] != 'fresh']
+            hosts[host] = {
+                'requests': len(reqs), 'bytes': sum(r['bytes'] for r in reqs),
+                'errors': sum(1 for r in reqs if r['error']), 'retries': sum(r['retries'] for r in reqs),
+                'backoffSeconds': sum(r['backoffSeconds'] for r in reqs),
+                'statuses': dict(Counter(str(r['status']) for r in reqs)),
+                'cache': dict(Counter(r['cache'] or 'off' for r in reqs)),
+                'latencyMs': {'p50': _percentile(network, 50), 'p95': _percentile(network, 95),
+                              'max': max(network, default=0.0), 'total': round(sum(network), 1)},
+            }
+        return {
+            'target': target, 'startedAt': self.started_at.isoformat(),
+            'durationSeconds': round(time.perf_counter() - self.started, 3),
+            'parseBackend': engine.parse_backend, 'parseWorkers': engine.parse_workers,
+            'cache': dict(engine.cache.stats) if engine.cache else None,
+            'scrapers': scrapers, 'hosts': hosts,
+            'requests': sorted(self.requests, key=lambda r: (r['source'], r['url'])),
+        }
+
+    @staticmethod
+    def to_prometheus(report: Dict[str, Any]) -> str:
+        def esc(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"')
+        lines = [
+            '# HELP asstar_fetch_run_duration_seconds Wall time of the whole fetch run.',
+            '# TYPE asstar_fetch_run_duration_seconds gauge',
+            f"asstar_fetch_run_duration_seconds {report['durationSeconds']}",
+        ]
+        host_metrics = [
+            ('requests', 'requests_total', 'Requests issued per host.'),
+            ('bytes', 'response_bytes_total', 'Response bytes received per host.'),
+            ('errors', 'errors_total', 'Requests that failed after all retries.'),
+            ('retries', 'retries_total', 'Retry attempts per host.'),
+            ('backoffSeconds', 'backoff_seconds_total', 'Time spent sleeping before retries.'),
+        ]
+        for key, metric, help_text in host_metrics:
+            lines += [f'# HELP asstar_fetch_{metric} {help_text}', f'# TYPE asstar_fetch_{metric} counter']
+            lines += [f'asstar_fetch_{metric}{{host="{esc(h)}"}} {v[key]}' for h, v in report['hosts'].items()]
+        lines += ['# HELP asstar_fetch_latency_seconds Request latency quantiles per host.', '# TYPE asstar_fetch_latency_seconds gauge']
+        for h, v in report['hosts'].items():
+            for q, key in (('0.5', 'p50'), ('0.95', 'p95'), ('1', 'max')):
+                lines.append(f'asstar_fetch_latency_seconds{{host="{esc(h)}",quantile="{q}"}} {v["latencyMs"][key] / 1000:.4f}')
+        lines += ['# HELP asstar_scraper_stage_seconds Time spent per scraper and stage.', '# TYPE asstar_scraper_stage_seconds gauge']
+        for name, v in report['scrapers'].items():
+            for stage, key in (('wall', 'wallSeconds'), ('fetch', 'fetchSeconds'), ('parse', 'parseSeconds'), ('serialize', 'serializeSeconds')):
+                if v.get(key) is not None:
+                    lines.append(f'asstar_scraper_stage_seconds{{scraper="{name}",stage="{stage}"}} {v[key]}')
+        lines += ['# HELP asstar_scraper_records Records produced per scraper.', '# TYPE asstar_scraper_records gauge']
+        lines += [f'asstar_scraper_records{{scraper="{name}"}} {v["records"]}' for name, v in report['scrapers'].items()]
+        lines += ['# HELP asstar_scraper_up Whether the scraper finished without error.', '# TYPE asstar_scraper_up gauge']
+        lines += [f'asstar_scraper_up{{scraper="{name}"}} {int(v["status"] == "ok")}' for name, v in report['scrapers'].items()]
+        return '\n'.join(lines) + '\n'
+
+class RunProfiler:
+    """cProfile of the event loop thread plus a wall-clock stack sampler covering every thread.
+
+    Writes profile.pstats, profile.txt (top functions by cumulative time) and stacks.folded
+    (collapsed stacks for flamegraph tools) into the output directory. Parsing in the process
+    pool is not visible here; combine with --parse-workers 0 to profile it.
+    """
+    def __init__(self, out_dir: str, interval: float = 0.005):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name='stack-sampler', daemon=True)
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join([names.get(ident, str(ident))] + stack[::-1])] += 1
+
+    def __enter__(self):
+        self._sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.profile.dump_stats(os.path.join(self.out_dir, 'profile.pstats'))
+        with open(os.path.join(self.out_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+            pstats.Stats(self.profile, stream=f).sort_stats('cumulative').print_stats(40)
+        with open(os.path.join(self.out_dir, 'stacks.folded'), 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        print(f"Profile written to {self.out_dir}")
+
+class FixtureStore:
+    """Directory of recorded responses: index.json plus one body file per URL."""
+    HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link', 'Location')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(path, 'index.json'), 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {'recordedOn': None, 'responses': {}}
+
+    @property
+    def recorded_on(self) -> Optional[date]:
+        return date.fromisoformat(self.index['recordedOn']) if self.index.get('recordedOn') else None
+
+    def save(self, url: str, resp):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()[:20] + '.body'
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, name), 'wb') as f:
+                f.write(resp.content)
+            self.index['recordedOn'] = self.index.get('recordedOn') or date.today().isoformat()
+            self.index['responses'][url] = {
+                'status': resp.status_code, 'file': name,
+                'headers': {h: resp.headers[h] for h in self.HEADERS if h in resp.headers}
+            }
+            with open(os.path.join(self.path, 'index.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, ensure_ascii=False)
+
+    def load(self, url: str) -> Optional[tuple]:
+        entry = self.index['responses'].get(url)
+        if not entry:
+            return None
+        with open(os.path.join(self.path, entry['file']), 'rb') as f:
+            return entry, f.read()
+
+class RecordingAdapter:
+    """Transport adapter that saves every response it receives into a FixtureStore."""
+    def __init__(self, store: FixtureStore, **kwargs):
+        from requests.adapters import HTTPAdapter
+        self.transport = HTTPAdapter(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        resp = self.transport.send(request, **kwargs)
+        self.store.save(request.url, resp)
+        return resp
+
+    def close(self):
+        self.transport.close()
+
+class ReplayAdapter:
+    """Transport adapter that answers from a FixtureStore and never touches the network."""
+    def __init__(self, store: FixtureStore):
+        self.store = store
+
+    def send(self, request, **kwargs):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        found = self.store.load(request.url)
+        resp = requests.Response()
+        if found:
+            entry, body = found
+            resp.status_code, resp._content = entry['status'], body
+            resp.headers = CaseInsensitiveDict(entry['headers'])
+        else:
+            resp.status_code, resp._content = 404, b'No fixture recorded for this URL'
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.url, resp.request, resp.reason = request.url, request, 'Replayed'
+        return resp
+
+    def close(self):
+        pass
+
+def run_parser(backend: str, parser: str, body: str, *args):
+    """Entry point for parser workers: returns (records, seconds spent parsing)."""
+    started = time.perf_counter()
+    records = PARSERS[parser][backend](body, *args)
+    return records, time.perf_counter() - started
+
+def _init_parse_worker():
+    # Ctrl-C is handled by the main process; a worker killed by it would break the pool.
+    # serve's SIGTERM handler raises KeyboardInterrupt, which must not run in workers either.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+class FetchEngine:
+    """Schedules requests from all scrapers under per-host rate limits and parses in a process pool.
+
+    The engine also carries the per-run settings scrapers share: the response cache,
+    an optional transport adapter (record/replay), the output directory and run stats.
+    """
+    def __init__(self, host_limits: Optional[Dict[str, tuple]] = None, cache: Optional[ResponseCache] = None,
+                 parse_workers: Optional[int] = None, queue_size: int = 8, parse_backend: str = 'lxml',
+                 adapter: Optional['BaseAdapter'] = None, output_dir: Optional[str] = None,
+                 today: Optional[date] = None, default_limit: tuple = DEFAULT_HOST_LIMIT,
+                 output_formats: tuple = ('v1', 'v2'), history: Optional['HistoryStore'] = None,
+                 schedule: Optional['RefreshSchedule'] = None, papers: Optional['PaperMetaStore'] = None):
+        self.host_limits = {**HOST_LIMITS, **(host_limits or {})}
+        self.default_limit = default_limit
+        self.cache = cache
+        self.adapter = adapter
+        self.output_dir = output_dir
+        self.output_formats = output_formats
+        self.history = history
+        self.schedule = schedule
+        # Paper metadata outlives the run when given a file; otherwise it is kept in memory
+        self.papers = papers or PaperMetaStore()
+        self._today = today
+        # 0 parses in-process on the event loop thread
+        self.parse_workers = min(4, os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.queue_size = queue_size
+        self.parse_backend = parse_backend
+        # scraper name -> {'pages', 'records', 'parse', 'serialize', ...} counters and seconds
+        self.stats: Dict[str, Dict[str, float]] = {}
+        # scraper name -> feed files written this run
+        self.outputs: Dict[str, List[str]] = {}
+        self.metrics = RunMetrics()
+        self.models = ModelStore()
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._io_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._session = None
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._loop = None
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one event loop; every asyncio.run() is a new run
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._limiters, self._flights = loop, {}, {}
+
+    async def single_flight(self, key: str, factory):
+        """Run factory() at most once per key for this run; every caller shares its result."""
+        self._bind_loop()
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(factory())
+
+            def forget_failure(t):
+                if t.cancelled() or t.exception() is not None:
+                    self._flights.pop(key, None)
+            task.add_done_callback(forget_failure)
+        return await asyncio.shield(task)
+
+    def today(self) -> date:
+        """Date used to build date-based URLs; pinned to the recording date when replaying."""
+        return self._today or date.today()
+
+    def add_stat(self, source: str, key: str, value: float):
+        stats = self.stats.setdefault(source, {})
+        stats[key] = stats.get(key, 0) + value
+
+    async def io(self, func, *args):
+        """Run blocking I/O (requests, cache files) on the engine's own threads.
+
+        The pool has one thread per in-flight slot across all host budgets, so the
+        limiters, not the event loop's small default executor, bound concurrency.
+        """
+        if self._io_pool is None:
+            workers = sum(limit[2] for limit in self.host_limits.values()) + self.default_limit[2]
+            self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch')
+        return await asyncio.get_running_loop().run_in_executor(self._io_pool, func, *args)
+
+    async def parse(self, source: str, parser: str, body: str, *args):
+        if self.parse_workers <= 0:
+            records, seconds = run_parser(self.parse_backend, parser, body, *args)
+        else:
+            if self._pool is None:
+                # Fetch threads are already running by now, so workers must not be forked from this process
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.parse_workers, mp_context=multiprocessing.get_context(method),
+                    initializer=_init_parse_worker)
+            records, seconds = await asyncio.get_running_loop().run_in_executor(
+                self._pool, run_parser, self.parse_backend, parser, body, *args)
+        self.add_stat(source, 'pages', 1)
+        self.add_stat(source, 'parse', seconds)
+        self.add_stat(source, 'records', len(records))
+        return records
+
+    def parse_report(self) -> str:
+        parts = [f"{name} {st['parse'] * 1000:.1f} ms/{int(st['pages'])} pages" for name, st in self.stats.items() if 'parse' in st]
+        return f"Parse time ({self.parse_backend}): " + (', '.join(parts) or 'nothing parsed')
+
+    def begin_run(self):
+        """Reset per-run state so a long-lived engine (serve) reports and dedupes each refresh on its own."""
+        self.stats, self.outputs = {}, {}
+        self.metrics = RunMetrics()
+        self.models = ModelStore()
+        if self.cache:
+            self.cache.stats = dict.fromkeys(self.cache.stats, 0)
+        if self.history:
+            self.history.begin()
+
+    @property
+    def session(self):
+        """One keep-alive session for every scraper, so connections to a host are reused run-wide."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            limits = [*self.host_limits.values(), self.default_limit]
+            adapter = self.adapter or HTTPAdapter(pool_connections=len(limits), pool_maxsize=max(l[2] for l in limits))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown()
+            self._io_pool = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def limiter(self, url: str) -> HostLimiter:
+        self._bind_loop()
+        host = urlparse(url).hostname or ''
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(*self.host_limits.get(host, self.default_limit))
+        return self._limiters[host]
+
+def _retryable(error: Exception) -> bool:
+    """Client errors (404, 410, ...) will not change on retry; rate limiting (429) may."""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return not (status and 400 <= status < 500 and status != 429)
+
 class BaseScraper:
-    def __init__(self, user_agent: Optional[str] = None):
-        self.session = requests.Session()
-        ua = user_agent or 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
-        self.session.headers.update({'User-Agent': ua})
+    name = ''
+    # Merges into engine.models and renders after ModelStore.settle()
+    merges_models = False
+    # Seconds a cached response is reused without revalidation; 0 always sends a conditional request
+    cache_ttl = 0
+    # False for one-off URLs (pagination cursors) that would only churn the response cache
+    use_cache = True
+
+    def __init__(self, user_agent: Optional[str] = None, engine: Optional[FetchEngine] = None):
+        self.engine = engine or FetchEngine()
+        self.user_agent = user_agent or DEFAULT_UA
         self.timeout = 30
         self.max_retries = 3
+        # Feed paths served from the refresh schedule instead of fetched this run
+        self.carried: set = set()
 
-    def get(self, url: str) -> str:
+    def _fresh_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry if it is still within this scraper's TTL."""
+        cache = self.engine.cache if self.use_cache else None
+        entry = cache.load(url) if cache and self.cache_ttl > 0 else None
+        if entry and time.time() - entry['storedAt'] < self.cache_ttl:
+            cache.count('hits')
+            cache.mark_used(url)
+            return entry
+        return None
+
+    def _fetch_once(self, url: str, info: Optional[Dict[str, Any]] = None) -> str:
+        info = info if info is not None else {}
+        cache = self.engine.cache if self.use_cache else None
+        # Fresh entries were already answered by _aget before it took a host slot
+        entry = cache.load(url) if cache else None
+        headers = {'User-Agent': self.user_agent}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('lastModified'):
+            headers['If-Modified-Since'] = entry['lastModified']
+        resp = self.engine.session.get(url, timeout=self.timeout, headers=headers)
+        info.update(status=resp.status_code, bytes=len(resp.content))
+        if resp.status_code == 304 and entry:
+            info['cache'] = 'revalidated'
+            cache.count('revalidated')
+            cache.touch(url, entry)
+            return entry['body']
+        resp.raise_for_status()
+        if 'next' in resp.links:
+            info['next'] = resp.links['next']['url']
+        # Use header encoding if available, otherwise fallback to apparent or utf-8
+        if not resp.encoding or resp.encoding.lower() == 'iso-8859-1':
+            resp.encoding = resp.apparent_encoding or 'utf-8'
+        if cache:
+            info['cache'] = 'miss'
+            cache.count('misses')
+            cache.store(url, resp.headers, resp.text)
+        return resp.text
+
+    async def aget(self, url: str) -> str:
+        """Fetch with retries, scheduled through the engine's host budgets and coalesced per URL for the run."""
+        return await self.engine.single_flight(url, lambda: self._aget(url))
+
+    async def apage(self, url: str) -> tuple:
+        """Fetch one page of a cursor-paginated API: (body, next page URL from the Link header or None)."""
+        info = self.engine.metrics.new_request(self.name, url)
+        body = await self._aget(url, info)
+        return body, info.pop('next', None)
+
+    async def _aget(self, url: str, info: Optional[Dict[str, Any]] = None) -> str:
+        metrics = self.engine.metrics
+        info = info if info is not None else metrics.new_request(self.name, url)
+        # Fresh cache hits never touch the network, so they skip the host budget too
+        fresh = await self.engine.io(self._fresh_entry, url)
+        if fresh:
+            info.update(cache='fresh', bytes=len(fresh['body']))
+            metrics.record_request(info)
+            return fresh['body']
         for attempt in range(1, self.max_retries + 1):
             try:
-                resp = self.session.get(url, timeout=self.timeout)
-                resp.raise_for_status()
-                # Use header encoding if available, otherwise fallback to apparent or utf-8
-                if not resp.encoding or resp.encoding.lower() == 'iso-8859-1':
-                    resp.encoding = resp.apparent_encoding or 'utf-8'
-                return resp.text
+                async with self.engine.limiter(url):
+                    started = time.perf_counter()
+                    try:
+                        body = await self.engine.io(self._fetch_once, url, info)
+                    finally:
+                        elapsed = time.perf_counter() - started
+                        info['latencyMs'] += elapsed * 1000
+                        self.engine.add_stat(self.name, 'fetch', elapsed)
+                metrics.record_request(info)
+                return body
             except Exception as e:
-                if attempt == self.max_retries:
+                if attempt == self.max_retries or not _retryable(e):
+                    info['error'] = str(e)
+                    metrics.record_request(info)
                     raise
                 print(f"  Attempt {attempt} failed for {url}: {e}. Retrying...")
-                time.sleep(attempt * 2)
+                info['retries'] += 1
+                info['backoffSeconds'] += attempt * 2
+                await asyncio.sleep(attempt * 2)
         return ""
 
-def get_output_path(filename: str) -> str:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    feeds_dir = os.path.join(os.path.dirname(script_dir), 'feeds')
-    os.makedirs(feeds_dir, exist_ok=True)
-    return os.path.join(feeds_dir, filename)
+    async def stream(self, jobs: Dict[Any, tuple]):
+        """Fetch and parse jobs {key: (url, parser name, *args)}, yielding (key, records) as each finishes.
 
-# --- GitHub Trending Scraper ---
+        I/O tasks push raw bodies into a bounded queue that parser workers drain into the
+        engine's process pool, so parsing overlaps the remaining downloads. A failed fetch
+        or parse is yielded as the exception in place of the records.
+        """
+        schedule = self.engine.schedule
+        carried = {}
+        if schedule:
+            jobs, carried = schedule.split(self.name, jobs)
+        for key, records in carried.items():
+            self.carried.update(self.section_paths(key))
+            yield key, records
+        bodies: asyncio.Queue = asyncio.Queue(maxsize=self.engine.queue_size)
+        results: asyncio.Queue = asyncio.Queue()
 
-class GitHubTrendingScraper(BaseScraper):
-    def _parse_repo_article(self, article) -> Optional[Dict[str, Any]]:
+        async def fetch(key, url):
+            try:
+                body = await self.aget(url)
+            except Exception as e:
+                body = e
+            await bodies.put((key, body))
+
+        async def parse_worker():
+            while True:
+                key, body = await bodies.get()
+                if not isinstance(body, Exception):
+                    parser, *args = jobs[key][1:]
+                    try:
+                        body = await self.engine.parse(self.name, parser, body, *args)
+                    except Exception as e:
+                        body = e
+                await results.put((key, body))
+
+        tasks = [asyncio.create_task(fetch(key, job[0])) for key, job in jobs.items()]
+        tasks += [asyncio.create_task(parse_worker()) for _ in range(max(1, self.engine.parse_workers))]
         try:
-            repo_link = article.find('h2', class_='h3').find('a')
-            repo_name = repo_link.get_text(strip=True)
-            repo_url = 'https://github.com' + repo_link.get('href')
-            description_elem = article.find('p')
-            description = description_elem.get_text(strip=True) if description_elem else 'No description available'
-            language_elem = article.find(attrs={'itemprop': 'programmingLanguage'})
-            language = language_elem.get_text(strip=True) if language_elem else 'Unknown'
-            stars_elem = article.find('a', href=re.compile(r'/stargazers'))
-            stars_text = stars_elem.get_text(strip=True) if stars_elem else '0'
-            stars = re.sub(r'[^\d]', '', stars_text) or '0'
-            forks_elem = article.find('a', href=re.compile(r'/forks'))
-            forks_text = forks_elem.get_text(strip=True) if forks_elem else '0'
-            forks = re.sub(r'[^\d]', '', forks_text) or '0'
-            stars_today_elem = article.find('span', class_='d-inline-block float-sm-right')
-            stars_today_text = stars_today_elem.get_text(strip=True) if stars_today_elem else '0'
-            stars_today = re.sub(r'[^\d]', '', stars_today_text) or '0'
-            built_by = []
-            avatar_imgs = article.find_all('img', class_='avatar')
-            for img in avatar_imgs[:5]:
-                username = img.get('alt', '').replace('@', '')
-                if username: built_by.append(f"@{username}")
-            
-            return {
-                'name': repo_name, 'description': description, 'language': language,
-                'stars': f"{int(stars):,}", 'forks': f"{int(forks):,}",
-                'starsToday': f"{int(stars_today):,}", 'url': repo_url, 'builtBy': built_by
-            }
-        except Exception as e:
-            print(f"  Error parsing GitHub repo: {e}")
-            return None
+            for _ in range(len(jobs)):
+                key, records = await results.get()
+                if schedule:
+                    fetched, records = records, schedule.update(self.name, key, jobs[key][0], records)
+                    if records is not fetched:
+                        self.carried.update(self.section_paths(key))
+                yield key, records
+        finally:
+            for task in tasks:
+                task.cancel()
+            if schedule:
+                schedule.save(self.name)
+                print(f"  Schedule: {len(jobs)} sections refreshed, {len(carried)} carried forward")
+
+    def writer(self, filename: str, skeleton: Dict[str, Any]) -> 'FeedWriter':
+        return FeedWriter(filename, skeleton, source=self.name, engine=self.engine, carried=self.carried)
+
+    def section_paths(self, key: Any) -> List[tuple]:
+        """Feed paths filled from the stream() job with this key."""
+        return [key if isinstance(key, tuple) else (key,)]
+
+    async def arun(self):
+        raise NotImplementedError
+
+    async def execute(self):
+        """Run arun() and record its wall time and outcome in the run metrics."""
+        started = time.perf_counter()
+        self.carried.clear()
+        try:
+            await self.arun()
+        except BaseException as e:
+            self.engine.metrics.record_scraper(self.name, time.perf_counter() - started, e)
+            raise
+        self.engine.metrics.record_scraper(self.name, time.perf_counter() - started)
 
     def run(self):
+        return asyncio.run(self.execute())
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(ROOT_DIR, '.cache', 'http')
+
+def get_output_path(filename: str, feeds_dir: Optional[str] = None) -> str:
+    path = os.path.join(feeds_dir or os.path.join(ROOT_DIR, 'feeds'), filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# --- Change Detection & Delta Feeds ---
+
+# Keys that change on every run; they never count as a content change
+VOLATILE_KEYS = ('lastUpdated', 'savedAt')
+MANIFEST_FILE = 'manifest.json'
+
+def content_hash(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def stable_content(doc: Any) -> Any:
+    return {k: v for k, v in doc.items() if k not in VOLATILE_KEYS} if isinstance(doc, dict) else doc
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def _path_pointer(path: tuple) -> str:
+    pointer = ''
+    for key in path:
+        pointer = _pointer(pointer, key)
+    return pointer
+
+def _is_section(value: Any) -> bool:
+    """A section is a list of item dicts that do not nest further item lists."""
+    return isinstance(value, list) and all(
+        isinstance(item, dict) and not any(isinstance(v, list) and v and isinstance(v[0], dict) for v in item.values())
+        for item in value)
+
+def _section_ops(prev: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rebuild a section from the previous one: an int reuses prev[int], an object is a new item."""
+    available: Dict[str, List[int]] = {}
+    for i, item in enumerate(prev):
+        available.setdefault(content_hash(item), []).append(i)
+    items = []
+    for item in new:
+        reuse = available.get(content_hash(item))
+        items.append(reuse.pop(0) if reuse else item)
+    reused = [x for x in items if isinstance(x, int)]
+    return {'items': items, 'added': len(items) - len(reused), 'removed': len(prev) - len(reused),
+            'reordered': reused != sorted(reused)}
+
+def build_delta(prev: Any, new: Any, path: str = '', delta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Describe how to turn prev into new: changed sections as item ops, other changes as set/remove."""
+    delta = delta if delta is not None else {'set': {}, 'remove': [], 'sections': {}}
+    if isinstance(prev, dict) and isinstance(new, dict):
+        delta['remove'].extend(_pointer(path, k) for k in prev if k not in new)
+        for k, v in new.items():
+            if k in prev:
+                build_delta(prev[k], v, _pointer(path, k), delta)
+            else:
+                delta['set'][_pointer(path, k)] = v
+    elif _is_section(prev) and _is_section(new) and (prev or new):
+        if prev != new:
+            delta['sections'][path] = _section_ops(prev, new)
+    elif isinstance(prev, list) and isinstance(new, list) and len(prev) == len(new) and all(isinstance(x, dict) for x in new):
+        # Lists of containers (e.g. Tophub cards) are diffed position by position
+        for i, (a, b) in enumerate(zip(prev, new)):
+            build_delta(a, b, _pointer(path, i), delta)
+    elif prev != new:
+        delta['set'][path] = new
+    return delta
+
+def apply_delta(doc: Any, delta: Dict[str, Any]) -> Any:
+    """Reference client: apply a delta produced by build_delta to a copy of the previous document."""
+    doc = json.loads(json.dumps(doc))
+
+    def walk(pointer: str):
+        keys = [k.replace('~1', '/').replace('~0', '~') for k in pointer.split('/')[1:]]
+        node = doc
+        for k in keys[:-1]:
+            node = node[int(k)] if isinstance(node, list) else node[k]
+        return node, (int(keys[-1]) if isinstance(node, list) else keys[-1])
+
+    for pointer, ops in delta['sections'].items():
+        node, key = walk(pointer)
+        prev = node[key]
+        node[key] = [prev[x] if isinstance(x, int) else x for x in ops['items']]
+    for pointer in delta['remove']:
+        node, key = walk(pointer)
+        del node[key]
+    for pointer, value in delta['set'].items():
+        if pointer == '':
+            return value
+        node, key = walk(pointer)
+        node[key] = value
+    return doc
+
+# --- Compact v2 Output ---
+
+SCHEMA_VERSION = 2
+V2_DIR = 'v2'
+# Fields v1 serializes as display strings such as "12,039"; v2 stores them as integers
+NUMERIC_FIELDS = ('likes', 'downloads', 'stars', 'forks', 'starsToday')
+
+def _to_int(value: Any) -> Any:
+    if isinstance(value, str):
+        digits = value.replace(',', '').strip()
+        return int(digits) if digits.isdigit() else value
+    return value
+
+def to_typed(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _to_int(v) if k in NUMERIC_FIELDS else to_typed(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_typed(v) for v in value]
+    return value
+
+def encode_v2(doc: Dict[str, Any]) -> bytes:
+    return json.dumps({'schemaVersion': SCHEMA_VERSION, **to_typed(doc)}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_precompressed(path: str, payload: bytes) -> Dict[str, int]:
+    """Write payload plus .gz (and .br when brotli is installed) siblings; returns sizes by suffix."""
+    variants = {'': payload, '.gz': gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(payload, quality=11)
+    for suffix, data in variants.items():
+        with open(path + suffix, 'wb') as f:
+            f.write(data)
+    return {suffix.lstrip('.') or 'json': len(data) for suffix, data in variants.items()}
+
+class FeedWriter:
+    """Receives a scraper's sections as they are parsed and writes the feed file once complete.
+
+    The skeleton fixes the key order of the output document; sections are filled in
+    (put) or appended to (extend) in whatever order their pages finish parsing.
+    """
+    def __init__(self, filename: str, skeleton: Dict[str, Any], source: str = '', engine: Optional[FetchEngine] = None,
+                 carried: Optional[set] = None):
+        self.filename = filename
+        self.data = skeleton
+        self.source = source
+        self.engine = engine
+        # Paths whose records were carried forward, not observed now; history skips them
+        self.carried = carried if carried is not None else set()
+        # Optional data -> v2 document transform for feeds whose v2 shape differs from v1
+        self.v2_builder = None
+
+    def _parent(self, path: tuple) -> Dict[str, Any]:
+        node = self.data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        return node
+
+    def put(self, path: tuple, value: Any):
+        self._parent(path)[path[-1]] = value
+
+    def extend(self, path: tuple, records: List[Any]):
+        self._parent(path).setdefault(path[-1], []).extend(records)
+
+    def save(self, keep_existing: bool = False) -> bool:
+        """Write the feed if its content changed, plus a delta against the previous snapshot.
+
+        Content is compared by hash with the volatile timestamps left out, so an unchanged
+        feed keeps its bytes. The time of each check lives in feeds/manifest.json instead.
+        With keep_existing an existing file is left alone (used for empty results).
+        """
+        feeds_dir = self.engine.output_dir if self.engine else None
+        formats = self.engine.output_formats if self.engine else ('v1', 'v2')
+        dest = get_output_path(self.filename, feeds_dir)
+        if keep_existing and os.path.exists(dest):
+            return False
+        started = time.perf_counter()
+        if self.engine and self.engine.schedule:
+            stale = self.engine.schedule.stale.get(self.source)
+            if stale:
+                self.data['stale'] = stale
+            else:
+                self.data.pop('stale', None)
+        if self.engine and self.engine.history:
+            self.engine.history.record(self.source, self.data, skip={_path_pointer(path) for path in self.carried})
+        new_hash = content_hash(stable_content(self.data))
+        changed = False
+        if 'v1' in formats:
+            changed = self._save_v1(dest, feeds_dir, new_hash)
+        if 'v2' in formats:
+            changed = self._save_v2(feeds_dir, new_hash) or changed
+        if self.engine:
+            self.engine.add_stat(self.source, 'serialize', time.perf_counter() - started)
+            outputs = self.engine.outputs.setdefault(self.source, [])
+            if 'v1' in formats:
+                outputs.append(dest)
+            if 'v2' in formats:
+                outputs.append(get_output_path(f"{V2_DIR}/{self.filename}", feeds_dir))
+        return changed
+
+    def _save_v1(self, dest: str, feeds_dir: Optional[str], new_hash: str) -> bool:
+        try:
+            with open(dest, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = None
+        old_hash = content_hash(stable_content(previous)) if previous is not None else None
+        if new_hash == old_hash:
+            print(f"  {self.filename} unchanged; file left as is")
+            self._update_manifest(feeds_dir, self.filename, new_hash)
+            return False
+        if previous is not None:
+            delta = {'file': self.filename, 'from': old_hash, 'to': new_hash, **build_delta(previous, self.data)}
+            with open(get_output_path(self.delta_filename, feeds_dir), 'w', encoding='utf-8') as f:
+                json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+        with open(dest, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        self._update_manifest(feeds_dir, self.filename, new_hash, delta_from=old_hash)
+        return True
+
+    def _save_v2(self, feeds_dir: Optional[str], new_hash: str) -> bool:
+        name = f"{V2_DIR}/{self.filename}"
+        dest = get_output_path(name, feeds_dir)
+        known = self._manifest(feeds_dir)['files'].get(name, {}).get('hash')
+        if known == new_hash and os.path.exists(dest):
+            self._update_manifest(feeds_dir, name, new_hash)
+            return False
+        sizes = write_precompressed(dest, encode_v2(self.v2_builder(self.data) if self.v2_builder else self.data))
+        self._update_manifest(feeds_dir, name, new_hash, sizes=sizes)
+        return True
+
+    @property
+    def delta_filename(self) -> str:
+        return self.filename[:-len('.json')] + '.delta.json'
+
+    @staticmethod
+    def _manifest(feeds_dir: Optional[str]) -> Dict[str, Any]:
+        try:
+            with open(get_output_path(MANIFEST_FILE, feeds_dir), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}}
+
+    def _update_manifest(self, feeds_dir: Optional[str], name: str, new_hash: str,
+                         delta_from: Optional[str] = None, sizes: Optional[Dict[str, int]] = None):
+        manifest = self._manifest(feeds_dir)
+        now = datetime.now(timezone.utc).isoformat()
+        entry = manifest['files'].setdefault(name, {})
+        if entry.get('hash') != new_hash:
+            entry.update(hash=new_hash, changedAt=now)
+            entry.pop('delta', None)
+        if delta_from:
+            # Clients holding the snapshot with hash 'from' can apply the delta instead of refetching
+            entry['delta'] = {'file': self.delta_filename, 'from': delta_from}
+        if sizes:
+            entry['bytes'] = sizes
+        entry['checkedAt'] = now
+        manifest['files'] = dict(sorted(manifest['files'].items()))
+        with open(get_output_path(MANIFEST_FILE, feeds_dir), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+# --- History Store ---
+
+DEFAULT_HISTORY_DB = os.path.join(ROOT_DIR, '.cache', 'history.sqlite3')
+HISTORY_METRICS = ('rank', 'stars', 'forks', 'likes', 'downloads')
+# (age in days, bucket in seconds): observations older than the age keep one row per bucket
+HISTORY_TIERS = ((30, 86400), (365, 7 * 86400))
+
+def iter_sections(doc: Any, path: str = ''):
+    """Yield (JSON Pointer, items) for every item list in a feed document."""
+    if isinstance(doc, dict):
+        for key, value in doc.items():
+            yield from iter_sections(value, _pointer(path, key))
+    elif _is_section(doc):
+        if doc:
+            yield path, doc
+    elif isinstance(doc, list):
+        for i, value in enumerate(doc):
+            yield from iter_sections(value, _pointer(path, i))
+
+class HistoryStore:
+    """Append-only SQLite log of every item observed in every run.
+
+    Each saved feed appends one row per item and section (rank plus the numeric fields);
+    entity ids are interned with their first/last-seen times so first-seen lookups never
+    touch the observation table. Old rows are thinned to one per day, then one per week.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entities (
+            id INTEGER PRIMARY KEY, source TEXT NOT NULL, key TEXT NOT NULL, title TEXT,
+            first_seen INTEGER NOT NULL, last_seen INTEGER NOT NULL, UNIQUE (source, key));
+        CREATE INDEX IF NOT EXISTS entities_first_seen ON entities (first_seen);
+        CREATE TABLE IF NOT EXISTS observations (
+            source TEXT NOT NULL, section TEXT NOT NULL, entity_id INTEGER NOT NULL, ts INTEGER NOT NULL,
+            rank INTEGER, stars INTEGER, forks INTEGER, likes INTEGER, downloads INTEGER);
+        CREATE INDEX IF NOT EXISTS observations_entity ON observations (source, entity_id, ts);
+        CREATE INDEX IF NOT EXISTS observations_section ON observations (source, section, ts);
+        CREATE INDEX IF NOT EXISTS observations_ts ON observations (source, ts);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+    """
+
+    def __init__(self, path: str, now: Optional[float] = None):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # serve appends from its refresh thread; access is never concurrent
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(self.SCHEMA)
+        self.begin(now)
+
+    def begin(self, now: Optional[float] = None):
+        # Every feed saved in one run shares the run's timestamp, so a run is one snapshot
+        self.ts = int(now if now is not None else time.time())
+        self.rows = 0
+
+    def _entity_id(self, source: str, key: str, title: Optional[str]) -> int:
+        self.db.execute(
+            "INSERT INTO entities (source, key, title, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (source, key) DO UPDATE SET last_seen = excluded.last_seen, title = excluded.title",
+            (source, key, title, self.ts, self.ts))
+        return self.db.execute("SELECT id FROM entities WHERE source = ? AND key = ?", (source, key)).fetchone()[0]
+
+    def record(self, source: str, doc: Dict[str, Any], skip: set = frozenset()):
+        """Append the doc's items; sections at or under a pointer in skip were not observed now."""
+        rows = []
+        with self.db:
+            for section, items in iter_sections(doc):
+                if any(section == pointer or section.startswith(pointer + '/') for pointer in skip):
+                    continue
+                for rank, item in enumerate(items, 1):
+                    key = item.get('url') or item.get('name') or item.get('title')
+                    if not key:
+                        continue
+                    title = ' '.join(str(item.get('name') or item.get('title') or '').split())
+                    entity_id = self._entity_id(source, key, title or None)
+                    values = [_to_int(item.get(field)) for field in HISTORY_METRICS[1:]]
+                    rows.append((source, section, entity_id, self.ts, rank,
+                                 *(v if isinstance(v, int) else None for v in values)))
+            self.db.executemany("INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.rows += len(rows)
+
+    def compact(self) -> int:
+        """Downsample old observations per HISTORY_TIERS; returns the number of rows removed."""
+        removed = 0
+        with self.db:
+            for age_days, bucket in HISTORY_TIERS:
+                meta_key = f"compactedTo:{bucket}"
+                row = self.db.execute("SELECT value FROM meta WHERE key = ?", (meta_key,)).fetchone()
+                lo = row[0] if row else 0
+                hi = (self.ts - age_days * 86400) // bucket * bucket
+                if hi <= lo:
+                    continue
+                # Keep the last row of each (source, section, entity, bucket); only the newly aged range is scanned
+                removed += self.db.execute(
+                    "DELETE FROM observations WHERE ts >= :lo AND ts < :hi AND rowid NOT IN ("
+                    " SELECT max(rowid) FROM observations WHERE ts >= :lo AND ts < :hi"
+                    " GROUP BY source, section, entity_id, ts / :bucket)",
+                    {'lo': lo, 'hi': hi, 'bucket': bucket}).rowcount
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (meta_key, hi))
+        return removed
+
+    def velocity(self, source: str, metric: str = 'stars', days: int = 30,
+                 entity: Optional[str] = None, limit: int = 20, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Change of a metric between the first and last observation in the window, per day.
+
+        Ranks only compare within one list, so for metric='rank' each (entity, section)
+        is its own row.
+        """
+        if metric not in HISTORY_METRICS:
+            raise ValueError(f"unknown metric {metric!r}")
+        since = self.ts - days * 86400
+        where = "source = :source AND ts >= :since AND {m} IS NOT NULL".format(m=metric)
+        if entity:
+            where += " AND entity_id = (SELECT id FROM entities WHERE source = :source AND key = :entity)"
+        if section:
+            where += " AND section = :section"
+        per_section = metric == 'rank'
+        group = "entity_id, section" if per_section else "entity_id"
+        probe = ("(SELECT {m} FROM observations WHERE source = :source AND entity_id = w.entity_id"
+                 + (" AND section = w.section" if per_section else "") + " AND ts = w.{t} AND {m} IS NOT NULL LIMIT 1)")
+        rows = self.db.execute(
+            f"SELECT e.key, e.title, {'w.section' if per_section else 'NULL'} AS section, w.t0, w.t1,"
+            f" {probe.format(m=metric, t='t0')} AS v0, {probe.format(m=metric, t='t1')} AS v1"
+            f" FROM (SELECT {group}, min(ts) AS t0, max(ts) AS t1 FROM observations WHERE {where} GROUP BY {group}) w"
+            " JOIN entities e ON e.id = w.entity_id",
+            {'source': source, 'since': since, 'entity': entity, 'section': section}).fetchall()
+        out = []
+        for r in rows:
+            span = (r['t1'] - r['t0']) / 86400
+            row = {'entity': r['key'], 'title': r['title']}
+            if per_section:
+                row['section'] = r['section']
+            row.update({'from': r['v0'], 'to': r['v1'], 'change': r['v1'] - r['v0'],
+                        'perDay': round((r['v1'] - r['v0']) / span, 2) if span else None, 'days': round(span, 2)})
+            out.append(row)
+        # For ranks a smaller number is better, so a negative change is a climb
+        sign = -1 if metric == 'rank' else 1
+        out.sort(key=lambda r: (sign * r['change'], r['perDay'] or 0), reverse=True)
+        return out[:limit]
+
+    def rank_change(self, source: str, days: int = 7, section: Optional[str] = None,
+                    limit: int = 20) -> List[Dict[str, Any]]:
+        """Items in each section's latest snapshot with their rank at the start of the window."""
+        since = self.ts - days * 86400
+        where = "source = :source AND ts >= :since" + (" AND section = :section" if section else "")
+        rows = self.db.execute(
+            "SELECT o.section, e.key, e.title, o.rank AS rank_now,"
+            " (SELECT p.rank FROM observations p WHERE p.source = o.source AND p.entity_id = o.entity_id"
+            "  AND p.section = o.section AND p.ts >= :since ORDER BY p.ts LIMIT 1) AS rank_then"
+            " FROM observations o JOIN entities e ON e.id = o.entity_id"
+            f" JOIN (SELECT section, max(ts) AS ts FROM observations WHERE {where} GROUP BY section) latest"
+            " ON latest.section = o.section AND latest.ts = o.ts WHERE o.source = :source",
+            {'source': source, 'since': since, 'section': section}).fetchall()
+        out = [{'section': r['section'], 'entity': r['key'], 'title': r['title'], 'then': r['rank_then'],
+                'now': r['rank_now'], 'change': r['rank_then'] - r['rank_now']} for r in rows]
+        out.sort(key=lambda r: r['change'], reverse=True)
+        return out[:limit]
+
+    def first_seen(self, source: Optional[str] = None, days: int = 7, limit: int = 50) -> List[Dict[str, Any]]:
+        """Entities first observed within the window, newest first."""
+        since = self.ts - days * 86400
+        rows = self.db.execute(
+            "SELECT source, key, title, first_seen FROM entities WHERE first_seen >= ?"
+            + (" AND source = ?" if source else "") + " ORDER BY first_seen DESC LIMIT ?",
+            (since, source, limit) if source else (since, limit)).fetchall()
+        return [{'source': r['source'], 'entity': r['key'], 'title': r['title'],
+                 'firstSeen': datetime.fromtimestamp(r['first_seen'], timezone.utc).isoformat()} for r in rows]
+
+    def close(self):
+        self.db.close()
+
+# --- Refresh Scheduler ---
+
+DEFAULT_SCHEDULE_DIR = os.path.join(ROOT_DIR, '.cache', 'schedule')
+# Refresh interval in hours per source and section (job key; '*' is the source default).
+# The workflow runs at 23, 03, 07 and 11 UTC: three 4 h gaps, then a 12 h overnight gap after
+# which every section of 12 h or less is due. In practice 0 (or 4) fetches on every run, 8 on the
+# 23:00 and 07:00 runs, 12 on the 23:00 and 11:00 runs, and 24 once a day on the 23:00 run.
+REFRESH_INTERVALS = {
+    'github': {'daily': 8, 'weekly': 12, 'monthly': 24},
+    'huggingface': {'trending': 8, '*': 24},
+    'interest': {'*': 12},
+    'papers': {'daily': 0, 'trending': 8, 'weekly': 12, 'monthly': 24},
+    'focus': {'*': 0},
+}
+# Runs start a few minutes apart from cron to cron; a section this close to due counts as due
+SCHEDULE_SLACK = 15 * 60
+
+def _section_key(key: Any) -> str:
+    return '/'.join(key) if isinstance(key, tuple) else str(key)
+
+class RefreshSchedule:
+    """Per-section refresh state for --schedule runs, one JSON file per source.
+
+    Each section (a scraper's job key) remembers when it was last fetched, from which URL,
+    and the records it parsed to. Sections that are not yet due are served from those
+    records without a request; a due section that fails falls back to them too and is
+    reported as stale in the feed instead of being dropped.
+    """
+    def __init__(self, state_dir: str, intervals: Optional[Dict[str, Dict[str, float]]] = None,
+                 now: Optional[float] = None):
+        self.state_dir = state_dir
+        self.intervals = intervals or REFRESH_INTERVALS
+        self.now = now if now is not None else time.time()
+        # source -> {section key: {'lastGood': ..., 'error': ...}} for failed refreshes this run
+        self.stale: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, source: str) -> str:
+        return os.path.join(self.state_dir, f"{source}.json")
+
+    def sections(self, source: str) -> Dict[str, Dict[str, Any]]:
+        if source not in self._state:
+            try:
+                with open(self._path(source), 'r', encoding='utf-8') as f:
+                    self._state[source] = json.load(f)
+            except (OSError, ValueError):
+                self._state[source] = {}
+        return self._state[source]
+
+    def interval(self, source: str, key: str) -> float:
+        intervals = self.intervals.get(source, {})
+        return intervals.get(key, intervals.get('*', 0)) * 3600
+
+    def due(self, source: str, key: Any, url: str) -> bool:
+        entry = self.sections(source).get(_section_key(key))
+        if not entry or entry.get('url') != url or entry.get('records') is None:
+            return True
+        return self.now - entry['fetchedAt'] >= self.interval(source, _section_key(key)) - SCHEDULE_SLACK
+
+    def split(self, source: str, jobs: Dict[Any, tuple]) -> tuple:
+        """Split jobs into (due jobs, {key: carried-forward records})."""
+        due = {key: job for key, job in jobs.items() if self.due(source, key, job[0])}
+        carried = {key: self.sections(source)[_section_key(key)]['records'] for key in jobs if key not in due}
+        return due, carried
+
+    def update(self, source: str, key: Any, url: str, records: Any) -> Any:
+        """Store a fresh result, or swap a failure for the last good records when there are any."""
+        entry = self.sections(source).get(_section_key(key))
+        if not isinstance(records, Exception):
+            self.sections(source)[_section_key(key)] = {'url': url, 'fetchedAt': self.now, 'records': records}
+            return records
+        if not entry or entry.get('records') is None:
+            return records
+        print(f"  {source}/{_section_key(key)} failed ({records}); keeping data from {self._iso(entry['fetchedAt'])}")
+        self.stale.setdefault(source, {})[_section_key(key)] = {'lastGood': self._iso(entry['fetchedAt']), 'error': str(records)}
+        return entry['records']
+
+    @staticmethod
+    def _iso(ts: float) -> str:
+        return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+    def save(self, source: str):
+        path = self._path(source)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.sections(source), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+# --- Search Index ---
+
+SEARCH_DIR = 'search'
+DEFAULT_SEARCH_STATE = os.path.join(ROOT_DIR, '.cache', 'search-state.json')
+# Feed file -> source name; an item listed by several feeds is indexed under the first
+SEARCH_FEEDS = {
+    'trending-data.json': 'github',
+    'huggingface-data.json': 'huggingface',
+    'huggingface-interest-data.json': 'interest',
+    'huggingface-papers-data.json': 'papers',
+    'realtime-focus.json': 'focus',
+}
+SEARCH_DOC_CHUNK = 64
+SEARCH_UNICODE_SHARDS = 32
+# Shorter 'extra' values are heat counts, authors or categories rather than descriptions
+SEARCH_MIN_EXTRA = 20
+# Kana, CJK ideographs (with extension A and compatibility) and Hangul
+_CJK_RUN = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+_WORD = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset('a an and are as at be by for from in is it of on or the to with'.split())
+
+def search_tokens(text: str) -> List[str]:
+    """Word tokens for Latin text and character bigrams for CJK runs (a lone CJK character stays a unigram)."""
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = [w for w in _WORD.findall(text) if len(w) > 1 and w not in _STOPWORDS]
+    for run in _CJK_RUN.findall(text):
+        tokens += [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+    return list(dict.fromkeys(tokens))
+
+def search_shard(term: str) -> str:
+    """Shard name for a term: its first character for a-z/0-9, a code point bucket otherwise."""
+    first = term[0]
+    return first if first.isascii() else f"u{ord(first) % SEARCH_UNICODE_SHARDS:02d}"
+
+def _search_items(feeds_dir: str):
+    """Yield (url, [source, label, title], text) for every item in the v1 feeds on disk."""
+    for filename, source in SEARCH_FEEDS.items():
+        try:
+            with open(os.path.join(feeds_dir, filename), 'r', encoding='utf-8') as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for pointer, items in iter_sections(doc):
+            keys = [k for k in pointer.split('/')[1:] if not k.isdigit() and k != 'items']
+            label = keys[-1].replace('~1', '/').replace('~0', '~') if keys else ''
+            for item in items:
+                url = item.get('url')
+                title = ' '.join(str(item.get('name') or item.get('title') or '').split())
+                if not url or not title:
+                    continue
+                extra = item.get('extra') or ''
+                text = ' '.join([title, item.get('description') or '', item.get('abstract') or '',
+                                 ' '.join(item.get('tags') or []), extra if len(extra) >= SEARCH_MIN_EXTRA else ''])
+                yield url, [source, label, title, url], text
+
+class SearchIndex:
+    """Static inverted index over every feed item, written to feeds/search/ for the browser.
+
+    terms-<shard>.json maps terms to sorted doc ids and docs-<n>.json holds the docs
+    ([source, label, title, url]) in chunks of SEARCH_DOC_CHUNK ids. A client fetches
+    index.json, then only the term shards of its query and the doc chunks of its hits.
+    Doc ids and per-item tokens persist in a state file, so a rebuild re-tokenizes only
+    changed items and rewrites only the shard files whose content changed. Without a
+    state path the state is only kept on the instance, for as long as it lives.
+    """
+    def __init__(self, feeds_dir: str, state_path: Optional[str] = DEFAULT_SEARCH_STATE):
+        self.feeds_dir = feeds_dir
+        self.out_dir = os.path.join(feeds_dir, SEARCH_DIR)
+        self.state_path = state_path
+        self._state: Optional[Dict[str, Any]] = None
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self._state is not None or not self.state_path:
+            return self._state or {'docs': {}}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'docs': {}}
+
+    def _write(self, name: str, payload: Any) -> bool:
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        path = get_output_path(f"{SEARCH_DIR}/{name}", self.feeds_dir)
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+        except OSError:
+            pass
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+
+    def build(self) -> Dict[str, int]:
+        known = self._load_state()['docs']
+        docs: Dict[str, Dict[str, Any]] = {}
+        retokenized = 0
+        for url, doc, text in _search_items(self.feeds_dir):
+            if url in docs:
+                continue
+            digest = content_hash([doc, text])
+            entry = known.get(url)
+            if entry and entry['hash'] == digest:
+                docs[url] = entry
+            else:
+                docs[url] = {'id': entry['id'] if entry else None, 'hash': digest, 'doc': doc, 'terms': search_tokens(text)}
+                retokenized += 1
+        # Surviving items keep their ids; new items fill the lowest ids that were freed
+        used = {entry['id'] for entry in docs.values() if entry['id'] is not None}
+        free = (i for i in range(len(docs) + len(used) + 1) if i not in used)
+        for entry in docs.values():
+            if entry['id'] is None:
+                entry['id'] = next(free)
+
+        postings: Dict[str, List[int]] = {}
+        chunks: Dict[int, Dict[str, Any]] = {}
+        for entry in docs.values():
+            for term in entry['terms']:
+                postings.setdefault(term, []).append(entry['id'])
+            chunks.setdefault(entry['id'] // SEARCH_DOC_CHUNK, {})[str(entry['id'])] = entry['doc']
+        shards: Dict[str, Dict[str, List[int]]] = {}
+        for term in sorted(postings):
+            shards.setdefault(search_shard(term), {})[term] = sorted(postings[term])
+
+        files = {f"terms-{name}.json": terms for name, terms in shards.items()}
+        files.update({f"docs-{n}.json": dict(sorted(chunk.items(), key=lambda kv: int(kv[0]))) for n, chunk in chunks.items()})
+        rewritten = sum(self._write(name, payload) for name, payload in sorted(files.items()))
+        self._write('index.json', {'version': 1, 'docs': len(docs), 'docChunk': SEARCH_DOC_CHUNK,
+                                   'unicodeShards': SEARCH_UNICODE_SHARDS, 'shards': sorted(shards), 'chunks': sorted(chunks)})
+        for name in os.listdir(self.out_dir):
+            if name not in files and name != 'index.json':
+                os.remove(os.path.join(self.out_dir, name))
+
+        self._state = {'docs': docs}
+        if self.state_path:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(self.state_path + '.tmp', self.state_path)
+        return {'docs': len(docs), 'terms': len(postings), 'retokenized': retokenized,
+                'removed': len(set(known) - set(docs)), 'files': len(files), 'rewritten': rewritten}
+
+def search(query: str, search_dir: str, limit: int = 20) -> List[List[str]]:
+    """Reference client: docs containing every query token, read from the shard files only."""
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+    with open(os.path.join(search_dir, 'index.json'), 'r', encoding='utf-8') as f:
+        shards = set(json.load(f)['shards'])
+    hits: Optional[set] = None
+    for token in tokens:
+        shard = search_shard(token)
+        ids = set()
+        if shard in shards:
+            with open(os.path.join(search_dir, f"terms-{shard}.json"), 'r', encoding='utf-8') as f:
+                ids = set(json.load(f).get(token, []))
+        hits = ids if hits is None else hits & ids
+    results = []
+    for doc_id in sorted(hits)[:limit]:
+        with open(os.path.join(search_dir, f"docs-{doc_id // SEARCH_DOC_CHUNK}.json"), 'r', encoding='utf-8') as f:
+            results.append(json.load(f)[str(doc_id)])
+    return results
+
+# --- lxml Extraction Helpers ---
+# The lxml backend mirrors the BeautifulSoup parsers record for record, but evaluates
+# precompiled XPath queries only inside the relevant cards instead of walking a soup tree.
+
+def _etree():
+    from lxml import etree
+    return etree
+
+class _XPath:
+    """An XPath compiled on first use, so module-level expressions do not load lxml at import."""
+    __slots__ = ('expr', '_compiled')
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self._compiled = None
+
+    def __call__(self, node):
+        if self._compiled is None:
+            self._compiled = _etree().XPath(self.expr)
+        return self._compiled(node)
+
+_HTML_PARSER = None
+# Same strings BeautifulSoup's get_text() yields: no comments, scripts, styles or templates
+_TEXT = _XPath('.//text()[not(parent::script or parent::style or ancestor::template)]')
+
+def _cls(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+def _text(el, separator: str = '') -> str:
+    """Equivalent of BeautifulSoup's get_text(separator, strip=True)."""
+    return separator.join(t for t in (s.strip() for s in _TEXT(el)) if t)
+
+def _html_root(html: str):
+    global _HTML_PARSER
+    etree = _etree()
+    if _HTML_PARSER is None:
+        _HTML_PARSER = etree.HTMLParser()
+    root = etree.fromstring(html, _HTML_PARSER) if html and html.strip() else None
+    return root if root is not None else etree.fromstring('<html></html>', _HTML_PARSER)
+
+# --- GitHub Trending Scraper ---
+
+def parse_github_repo(article) -> Optional[Dict[str, Any]]:
+    try:
+        repo_link = article.find('h2', class_='h3').find('a')
+        repo_name = repo_link.get_text(strip=True)
+        repo_url = 'https://github.com' + repo_link.get('href')
+        description_elem = article.find('p')
+        description = description_elem.get_text(strip=True) if description_elem else 'No description available'
+        language_elem = article.find(attrs={'itemprop': 'programmingLanguage'})
+        language = language_elem.get_text(strip=True) if language_elem else 'Unknown'
+        stars_elem = article.find('a', href=re.compile(r'/stargazers'))
+        stars_text = stars_elem.get_text(strip=True) if stars_elem else '0'
+        stars = re.sub(r'[^\d]', '', stars_text) or '0'
+        forks_elem = article.find('a', href=re.compile(r'/forks'))
+        forks_text = forks_elem.get_text(strip=True) if forks_elem else '0'
+        forks = re.sub(r'[^\d]', '', forks_text) or '0'
+        stars_today_elem = article.find('span', class_='d-inline-block float-sm-right')
+        stars_today_text = stars_today_elem.get_text(strip=True) if stars_today_elem else '0'
+        stars_today = re.sub(r'[^\d]', '', stars_today_text) or '0'
+        built_by = []
+        avatar_imgs = article.find_all('img', class_='avatar')
+        for img in avatar_imgs[:5]:
+            username = img.get('alt', '').replace('@', '')
+            if username: built_by.append(f"@{username}")
+        
+        return {
+            'name': repo_name, 'description': description, 'language': language,
+            'stars': f"{int(stars):,}", 'forks': f"{int(forks):,}",
+            'starsToday': f"{int(stars_today):,}", 'url': repo_url, 'builtBy': built_by
+        }
+    except Exception as e:
+        print(f"  Error parsing GitHub repo: {e}")
+        return None
+
+def parse_github_trending(html: str) -> List[Dict[str, Any]]:
+    soup = _soup(html)
+    repos = []
+    for article in soup.find_all('article', class_='Box-row')[:25]:
+        data = parse_github_repo(article)
+        if data: repos.append(data)
+    return repos
+
+_GH_ARTICLES = _XPath(f"//article[{_cls('Box-row')}]")
+_GH_TITLE = _XPath(f"(.//h2[{_cls('h3')}])[1]")
+_GH_DESCRIPTION = _XPath('(.//p)[1]')
+_GH_LANGUAGE = _XPath('(.//*[@itemprop="programmingLanguage"])[1]')
+_GH_STARS = _XPath('(.//a[contains(@href, "/stargazers")])[1]')
+_GH_FORKS = _XPath('(.//a[contains(@href, "/forks")])[1]')
+_GH_STARS_TODAY = _XPath('(.//span[normalize-space(@class) = "d-inline-block float-sm-right"])[1]')
+_GH_AVATARS = _XPath(f".//img[{_cls('avatar')}]")
+_FIRST_LINK = _XPath('(.//a)[1]')
+
+def _count(el) -> int:
+    return int(re.sub(r'[^\d]', '', _text(el) if el is not None else '0') or '0')
+
+def parse_github_repo_lxml(article) -> Optional[Dict[str, Any]]:
+    try:
+        title = _first(_GH_TITLE(article))
+        repo_link = _first(_FIRST_LINK(title)) if title is not None else None
+        if repo_link is None:
+            raise ValueError('repository link not found')
+        description_elem = _first(_GH_DESCRIPTION(article))
+        language_elem = _first(_GH_LANGUAGE(article))
+        built_by = []
+        for img in _GH_AVATARS(article)[:5]:
+            username = (img.get('alt') or '').replace('@', '')
+            if username: built_by.append(f"@{username}")
+
+        return {
+            'name': _text(repo_link),
+            'description': _text(description_elem) if description_elem is not None else 'No description available',
+            'language': _text(language_elem) if language_elem is not None else 'Unknown',
+            'stars': f"{_count(_first(_GH_STARS(article))):,}", 'forks': f"{_count(_first(_GH_FORKS(article))):,}",
+            'starsToday': f"{_count(_first(_GH_STARS_TODAY(article))):,}",
+            'url': 'https://github.com' + repo_link.get('href'), 'builtBy': built_by
+        }
+    except Exception as e:
+        print(f"  Error parsing GitHub repo: {e}")
+        return None
+
+def parse_github_trending_lxml(html: str) -> List[Dict[str, Any]]:
+    repos = []
+    for article in _GH_ARTICLES(_html_root(html))[:25]:
+        data = parse_github_repo_lxml(article)
+        if data: repos.append(data)
+    return repos
+
+class GitHubTrendingScraper(BaseScraper):
+    name = 'github'
+    cache_ttl = 3600
+
+    async def arun(self):
         periods = ['daily', 'weekly', 'monthly']
-        all_data = {}
-        for period in periods:
-            print(f"Fetching GitHub Trending ({period})...")
-            url = f'https://github.com/trending?since={period}' if period != 'daily' else 'https://github.com/trending'
-            html = self.get(url)
-            soup = BeautifulSoup(html, 'lxml')
-            repos = []
-            for article in soup.find_all('article', class_='Box-row')[:25]:
-                data = self._parse_repo_article(article)
-                if data: repos.append(data)
-            all_data[period] = repos
-            time.sleep(2)
-
-        output = {**all_data, 'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalRepositories': sum(len(r) for r in all_data.values())}
-        with open(get_output_path('trending-data.json'), 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
-        print(f"Saved GitHub Trending data. Total: {output['totalRepositories']}")
+        print(f"Fetching GitHub Trending ({', '.join(periods)})...")
+        jobs = {p: (f'https://github.com/trending?since={p}' if p != 'daily' else 'https://github.com/trending', 'github')
+                for p in periods}
+        writer = self.writer('trending-data.json', {p: [] for p in periods})
+        async for period, repos in self.stream(jobs):
+            if isinstance(repos, Exception):
+                raise repos
+            writer.put((period,), repos)
+
+        writer.data.update({'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalRepositories': sum(len(writer.data[p]) for p in periods)})
+        writer.save()
+        print(f"Saved GitHub Trending data. Total: {writer.data['totalRepositories']}")
 
 # --- HuggingFace Models Scraper ---
 
+HF_API = 'https://huggingface.co/api/models'
+# Model list name -> Hub API query
+HF_SORTS = {'trending': {'trending': 'true'}, 'likes': {'sort': 'likes'}, 'downloads': {'sort': 'downloads'}}
+HF_INTEREST_CATEGORIES = {
+    'voice': ['text-to-speech', 'automatic-speech-recognition', 'text-to-audio', 'voice-activity-detection', 'audio-to-audio', 'audio-classification'],
+    'multimodal': ['audio-text-to-text', 'image-text-to-video', 'image-text-to-image', 'image-text-to-text', 'visual-question-answering', 'document-question-answering'],
+    'vision': ['image-classification', 'object-detection', 'image-segmentation', 'zero-shot-image-classification', 'zero-shot-object-detection', 'image-feature-extraction']
+}
+
+def normalize_hf_model(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a Hub API model to the shared entity shape (integer counts, task None if untagged)."""
+    model_id = item.get('modelId') or item.get('id') or ''
+    if not model_id:
+        return None
+    card = item.get('cardData') or {}
+    return {
+        'name': model_id,
+        'description': item.get('description') or card.get('description') or 'No description available',
+        'task': item.get('pipeline_tag') or None,
+        'parameters': card.get('parameters') or 'Unknown',
+        'likes': int(item.get('likes') or 0),
+        'downloads': int(item.get('downloads') or 0),
+        'url': f"https://huggingface.co/{model_id}",
+        'tags': (item.get('tags') or card.get('tags') or [])[:5]
+    }
+
+def parse_hf_models(body: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    models = (normalize_hf_model(item) for item in json.loads(body)[:limit])
+    return [m for m in models if m]
+
+def hf_model_v1(model: Dict[str, Any], default_task: str = 'Unknown') -> Dict[str, Any]:
+    """Render a model entity in the v1 feed shape (display-string counts, task fallback)."""
+    return {**model, 'task': model['task'] or default_task,
+            'likes': f"{model['likes']:,}", 'downloads': f"{model['downloads']:,}"}
+
+class ModelStore:
+    """Deduplicated, id-keyed table of the HuggingFace models seen in a run.
+
+    Every HF list in the run merges its models here and keeps only ids, so a model that
+    appears in several lists (or in both HF feeds) is normalized and stored once. When
+    two responses disagree, the one with the higher counts wins regardless of arrival order.
+    Feeds render from the table only after settle(), which run_all holds until every
+    expected scraper has merged, so both HF feeds see the same final records.
+    """
+    def __init__(self):
+        self.models: Dict[str, Dict[str, Any]] = {}
+        # Scrapers of this run that have not merged yet; settle() waits for them
+        self._pending: set = set()
+        self._settled: Optional[asyncio.Event] = None
+
+    def expect(self, names):
+        """Call from the running loop before starting the scrapers that merge into the table."""
+        self._pending = set(names)
+        self._settled = asyncio.Event()
+        if not self._pending:
+            self._settled.set()
+
+    def release(self, name: str):
+        """Mark a scraper's lists as merged (or abandoned, if it failed)."""
+        self._pending.discard(name)
+        if not self._pending and self._settled:
+            self._settled.set()
+
+    async def settle(self, name: str):
+        """Release name and wait until every expected scraper has merged its lists."""
+        self.release(name)
+        if self._settled:
+            await self._settled.wait()
+
+    @staticmethod
+    def _rank(model: Dict[str, Any]) -> tuple:
+        return model['downloads'], model['likes'], content_hash(model)
+
+    def merge(self, models: List[Dict[str, Any]]) -> List[str]:
+        for model in models:
+            known = self.models.get(model['name'])
+            if known is None or self._rank(model) > self._rank(known):
+                self.models[model['name']] = model
+        return [model['name'] for model in models]
+
+    def table(self, ids) -> Dict[str, Dict[str, Any]]:
+        return {model_id: self.models[model_id] for model_id in ids}
+
+def model_refs_doc(data: Dict[str, Any], lists: Dict[tuple, List[str]], store: ModelStore,
+                   task_fallback: Optional[str] = None) -> Dict[str, Any]:
+    """Build the v2 document: a shared 'models' table plus id lists in place of model records."""
+    doc = json.loads(json.dumps(data))
+    for path, ids in lists.items():
+        node = doc
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = ids
+    ids = dict.fromkeys(model_id for model_ids in lists.values() for model_id in model_ids)
+    refs = {'models': store.table(ids), **doc}
+    if task_fallback:
+        refs['taskFallback'] = task_fallback
+    return refs
+
+def expand_model_refs(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Loader for v2 HF feeds: rebuild the v1 shape from the models table and id lists."""
+    models = doc.get('models', {})
+
+    def expand(value: Any, key: str) -> Any:
+        if isinstance(value, dict):
+            return {k: expand(v, k) for k, v in value.items()}
+        if isinstance(value, list) and value and all(isinstance(v, str) and v in models for v in value):
+            default_task = key if doc.get('taskFallback') == 'listKey' else 'Unknown'
+            return [hf_model_v1(models[v], default_task) for v in value]
+        return value
+    return {k: expand(v, k) for k, v in doc.items() if k not in ('models', 'taskFallback', 'schemaVersion')}
+
 class HuggingFaceScraper(BaseScraper):
-    def run(self):
-        api_base = 'https://huggingface.co/api/models'
-        categories = ['trending', 'likes', 'downloads']
-        all_data = {}
-        for cat in categories:
-            print(f"Fetching HuggingFace Models ({cat})...")
-            url = f"{api_base}?{urlencode({'sort': cat, 'limit': 25})}"
-            if cat == 'trending':
-                url = f"{api_base}?{urlencode({'trending': 'true', 'limit': 25})}"
-            
-            resp = self.session.get(url, timeout=self.timeout)
-            items = resp.json() if resp.status_code == 200 else []
-            
-            parsed_models = []
-            for item in items[:25]:
-                model_id = item.get('modelId') or item.get('id') or ''
-                if not model_id: continue
-                parsed_models.append({
-                    'name': model_id,
-                    'description': item.get('description') or item.get('cardData', {}).get('description') or 'No description available',
-                    'task': item.get('pipeline_tag') or 'Unknown',
-                    'parameters': item.get('cardData', {}).get('parameters') or 'Unknown',
-                    'likes': f"{int(item.get('likes') or 0):,}",
-                    'downloads': f"{int(item.get('downloads') or 0):,}",
-                    'url': f"https://huggingface.co/{model_id}",
-                    'tags': (item.get('tags') or item.get('cardData', {}).get('tags') or [])[:5]
-                })
-            all_data[cat] = parsed_models
-            time.sleep(2)
-
-        output = {**all_data, 'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalModels': sum(len(m) for m in all_data.values())}
-        dest = get_output_path('huggingface-data.json')
-        if output['totalModels'] > 0 or not os.path.exists(dest):
-            with open(dest, 'w', encoding='utf-8') as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
-        print(f"Saved HuggingFace Models data. Total: {output['totalModels']}")
+    name = 'huggingface'
+    cache_ttl = 1800
+    merges_models = True
+
+    async def arun(self):
+        categories = list(HF_SORTS)
+        print(f"Fetching HuggingFace Models ({', '.join(categories)})...")
+        jobs = {cat: (f"{HF_API}?{urlencode({**query, 'limit': 25})}", 'hf_models', 25) for cat, query in HF_SORTS.items()}
+        store = self.engine.models
+        lists: Dict[tuple, List[str]] = {(cat,): [] for cat in categories}
+        async for cat, models in self.stream(jobs):
+            if isinstance(models, Exception):
+                print(f"  Error fetching {cat}: {models}")
+                continue
+            lists[(cat,)] = store.merge(models)
+        await store.settle(self.name)
+
+        writer = self.writer('huggingface-data.json', {cat: [hf_model_v1(store.models[m]) for m in lists[(cat,)]] for cat in categories})
+        writer.v2_builder = lambda data: model_refs_doc(data, lists, store)
+        total = sum(len(ids) for ids in lists.values())
+        writer.data.update({'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalModels': total})
+        writer.save(keep_existing=total == 0)
+        print(f"Saved HuggingFace Models data. Total: {total} ({len(set().union(*lists.values()))} unique)")
 
 # --- HuggingFace Interest Scraper ---
 
 class HuggingFaceInterestScraper(BaseScraper):
-    def run(self):
-        api_base = 'https://huggingface.co/api/models'
-        categories = {
-            'voice': ['text-to-speech', 'automatic-speech-recognition', 'text-to-audio', 'voice-activity-detection', 'audio-to-audio', 'audio-classification'],
-            'multimodal': ['audio-text-to-text', 'image-text-to-video', 'image-text-to-image', 'image-text-to-text', 'visual-question-answering', 'document-question-answering'],
-            'vision': ['image-classification', 'object-detection', 'image-segmentation', 'zero-shot-image-classification', 'zero-shot-object-detection', 'image-feature-extraction']
-        }
-        all_data = {}
-        total_models = 0
-        for cat_name, tags in categories.items():
-            print(f"Fetching HuggingFace Interest ({cat_name})...")
-            cat_data = {}
-            for tag in tags:
-                url = f"{api_base}?{urlencode({'pipeline_tag': tag, 'trending': 'true', 'limit': 30})}"
-                tag_models = []
+    name = 'interest'
+    cache_ttl = 1800
+    merges_models = True
+
+    async def arun(self):
+        categories = HF_INTEREST_CATEGORIES
+        print(f"Fetching HuggingFace Interest ({', '.join(categories)})...")
+        jobs = {(cat_name, tag): (f"{HF_API}?{urlencode({'pipeline_tag': tag, 'trending': 'true', 'limit': 30})}", 'hf_models')
+                for cat_name, tags in categories.items() for tag in tags}
+        store = self.engine.models
+        lists: Dict[tuple, List[str]] = {key: [] for key in jobs}
+        async for (cat_name, tag), models in self.stream(jobs):
+            if isinstance(models, Exception):
+                print(f"  Error fetching {tag}: {models}")
+                continue
+            lists[(cat_name, tag)] = store.merge(models)
+        await store.settle(self.name)
+
+        # Models without a pipeline_tag fall back to the tag whose list they were found in
+        writer = self.writer('huggingface-interest-data.json', {
+            cat_name: {tag: [hf_model_v1(store.models[m], tag) for m in lists[(cat_name, tag)]] for tag in tags}
+            for cat_name, tags in categories.items()
+        })
+        writer.v2_builder = lambda data: model_refs_doc(data, lists, store, task_fallback='listKey')
+        total_models = sum(len(ids) for ids in lists.values())
+        writer.data.update({'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalModels': total_models})
+        writer.save(keep_existing=total_models == 0)
+        print(f"Saved HuggingFace Interest data. Total: {total_models} ({len(set().union(*lists.values()))} unique)")
+
+# --- HuggingFace Deep Crawl ---
+
+DEFAULT_DEEP_DIR = os.path.join(ROOT_DIR, '.cache', 'hf-deep')
+HF_PAGE_SIZE = 100
+
+class NDJSONShards:
+    """Append-only NDJSON output split into files of at most shard_size records (00000.ndjson, ...).
+
+    Opening at a saved (shard, count, offset) position truncates anything written after it,
+    so a page that was half-written when a run died is dropped and fetched again on resume.
+    """
+    def __init__(self, directory: str, shard_size: int, shard: int = 0, count: int = 0, offset: int = 0):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.shard, self.count = shard, count
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.ndjson') and int(name.split('.')[0]) > shard:
+                os.remove(os.path.join(directory, name))
+        self._file = open(self._path(shard), 'ab')
+        self._file.truncate(offset)
+
+    def _path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"{shard:05d}.ndjson")
+
+    def write(self, records):
+        for record in records:
+            if self.count == self.shard_size:
+                self._file.close()
+                self.shard, self.count = self.shard + 1, 0
+                self._file = open(self._path(self.shard), 'wb')
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+            self.count += 1
+        self._file.flush()
+
+    def position(self) -> Dict[str, int]:
+        return {'shard': self.shard, 'shardRecords': self.count, 'offset': self._file.tell()}
+
+    def files(self) -> List[str]:
+        return [os.path.basename(self._path(i)) for i in range(self.shard + 1)]
+
+    def close(self):
+        self._file.close()
+
+class HFDeepCrawler(BaseScraper):
+    """Crawl the top `limit` models of every HF list by following the Hub API's Link cursors.
+
+    Each list (sort order or pipeline tag) is one cursor chain, so pages within a list are
+    sequential while up to `concurrency` lists run at once under the huggingface.co budget.
+    Parsed pages go straight to NDJSON shards and a cursor file, so memory stays flat and
+    an interrupted crawl resumes from the last completed page.
+    """
+    name = 'hf-deep'
+    use_cache = False
+
+    def __init__(self, out_dir: str = DEFAULT_DEEP_DIR, limit: int = 5000, concurrency: int = 4,
+                 shard_size: int = 1000, restart: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.out_dir = out_dir
+        self.limit = limit
+        self.concurrency = concurrency
+        self.shard_size = shard_size
+        self.restart = restart
+
+    def lists(self) -> Dict[str, str]:
+        queries = {**HF_SORTS, **{f"tag-{tag}": {'pipeline_tag': tag, 'trending': 'true'}
+                                  for tags in HF_INTEREST_CATEGORIES.values() for tag in tags}}
+        return {name: f"{HF_API}?{urlencode({**query, 'limit': HF_PAGE_SIZE})}" for name, query in queries.items()}
+
+    @staticmethod
+    def _load_cursor(directory: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(directory, 'cursor.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_cursor(directory: str, cursor: Dict[str, Any]):
+        path = os.path.join(directory, 'cursor.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(cursor, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    async def crawl(self, name: str, first_url: str) -> Dict[str, Any]:
+        directory = os.path.join(self.out_dir, name)
+        if self.restart:
+            shutil.rmtree(directory, ignore_errors=True)
+        cursor = self._load_cursor(directory)
+        # A finished list is only picked up again when a larger --deep-limit leaves pages to follow
+        if cursor.get('done') and (not cursor.get('next') or cursor['records'] >= self.limit):
+            return {**cursor, 'files': [f"{i:05d}.ndjson" for i in range(cursor['shard'] + 1)]}
+        records, pages = cursor.get('records', 0), cursor.get('pages', 0)
+        url = cursor.get('next') or first_url
+        # Rows of the cursor page already written when the last run stopped mid-page
+        skip = cursor.get('skip', 0) if cursor.get('next') else 0
+        shards = NDJSONShards(directory, self.shard_size, cursor.get('shard', 0),
+                              cursor.get('shardRecords', 0), cursor.get('offset', 0))
+        try:
+            while url and records < self.limit:
+                body, next_url = await self.apage(url)
+                page = (await self.engine.parse(self.name, 'hf_models', body))[skip:]
+                models = page[:self.limit - records]
+                shards.write({'rank': records + i, **model} for i, model in enumerate(models, 1))
+                records, pages = records + len(models), pages + 1
+                if len(models) < len(page):
+                    # Stopped inside the page: a larger limit re-fetches it and skips what is written
+                    skip += len(models)
+                else:
+                    url, skip = (next_url if page else None), 0
+                # The cursor is saved only after its page is flushed, so resume never skips records
+                cursor = {'next': url, 'skip': skip, 'records': records, 'pages': pages, **shards.position(),
+                          'done': not url or records >= self.limit, 'updatedAt': datetime.now(timezone.utc).isoformat()}
+                self._save_cursor(directory, cursor)
+        finally:
+            shards.close()
+        return {**cursor, 'files': shards.files()}
+
+    async def arun(self):
+        lists = self.lists()
+        print(f"Deep crawl of {len(lists)} HuggingFace lists (top {self.limit} each) into {self.out_dir}...")
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(name, url):
+            async with slots:
                 try:
-                    resp = self.get(url)
-                    items = json.loads(resp) if isinstance(resp, str) else []
-                    
-                    for item in items:
-                        model_id = item.get('modelId') or item.get('id') or ''
-                        if not model_id: continue
-                        
-                        tag_models.append({
-                            'name': model_id,
-                            'description': item.get('description') or item.get('cardData', {}).get('description') or 'No description available',
-                            'task': item.get('pipeline_tag') or tag,
-                            'parameters': item.get('cardData', {}).get('parameters') or 'Unknown',
-                            'likes': f"{int(item.get('likes') or 0):,}",
-                            'downloads': f"{int(item.get('downloads') or 0):,}",
-                            'url': f"https://huggingface.co/{model_id}",
-                            'tags': (item.get('tags') or item.get('cardData', {}).get('tags') or [])[:5]
-                        })
+                    return await self.crawl(name, url)
                 except Exception as e:
-                    print(f"  Error fetching {tag}: {e}")
-                time.sleep(1)
-            
-                cat_data[tag] = tag_models
-                total_models += len(tag_models)
-
-            all_data[cat_name] = cat_data
+                    print(f"  {name} stopped: {e} (resume by running hf-deep again)")
+                    return {**self._load_cursor(os.path.join(self.out_dir, name)), 'error': str(e)}
 
-        output = {**all_data, 'lastUpdated': datetime.now(timezone.utc).isoformat(), 'totalModels': total_models}
-        dest = get_output_path('huggingface-interest-data.json')
-        if total_models > 0 or not os.path.exists(dest):
-            with open(dest, 'w', encoding='utf-8') as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
-        print(f"Saved HuggingFace Interest data. Total: {total_models}")
+        results = dict(zip(lists, await asyncio.gather(*(bounded(n, u) for n, u in lists.items()))))
+        with open(os.path.join(self.out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        total = sum(r.get('records', 0) for r in results.values())
+        finished = sum(1 for r in results.values() if r.get('done'))
+        print(f"Deep crawl: {total} models, {finished}/{len(lists)} lists complete")
 
 # --- HuggingFace Papers Scraper ---
 
+def parse_hf_papers(html: str) -> List[Dict[str, Any]]:
+    soup = _soup(html)
+    items = []
+    for article in soup.select('article, div[data-testid="paper-card"], li'):
+        a = article.select_one('a[href^="/papers/"]')
+        if not a: continue
+        href = a.get('href', '')
+        url = f"https://huggingface.co{href}" if href.startswith('/') else href
+        title_node = article.find(['h2', 'h3']) or a.find(['h2', 'h3'])
+        title = (title_node.get_text(strip=True) if title_node else None) or a.get('title') or a.get_text(strip=True)
+        if not title: continue
+        card_text = article.get_text(separator=' ', strip=True)
+        abstract = re.sub(re.escape(title), '', card_text).strip()[:240] if card_text else 'No abstract available.'
+        items.append({'title': title, 'authors': 'Unknown', 'abstract': abstract, 'url': url})
+    
+    if not items: # Fallback
+        for a in soup.select('a[href^="/papers/"]'):
+            href = a.get('href', ''); url = f"https://huggingface.co{href}" if href.startswith('/') else href
+            title = a.get('title') or a.get_text(strip=True)
+            if title: items.append({'title': title, 'authors': 'Unknown', 'abstract': 'No abstract available.', 'url': url})
+    
+    dedup = {f"{it['title']}|{it['url']}": it for it in items}
+    return list(dedup.values())[:50]
+
+_PAPER_CARDS = _XPath('//article | //div[@data-testid="paper-card"] | //li')
+_PAPER_LINKS = _XPath('//a[starts-with(@href, "/papers/")]')
+_PAPER_LINK = _XPath('(.//a[starts-with(@href, "/papers/")])[1]')
+_PAPER_HEADING = _XPath('(.//*[self::h2 or self::h3])[1]')
+
+def parse_hf_papers_lxml(html: str) -> List[Dict[str, Any]]:
+    root = _html_root(html)
+    items = []
+    for article in _PAPER_CARDS(root):
+        a = _first(_PAPER_LINK(article))
+        if a is None: continue
+        href = a.get('href') or ''
+        url = f"https://huggingface.co{href}" if href.startswith('/') else href
+        title_node = _first(_PAPER_HEADING(article))
+        if title_node is None:
+            title_node = _first(_PAPER_HEADING(a))
+        title = (_text(title_node) if title_node is not None else None) or a.get('title') or _text(a)
+        if not title: continue
+        card_text = _text(article, ' ')
+        abstract = card_text.replace(title, '').strip()[:240] if card_text else 'No abstract available.'
+        items.append({'title': title, 'authors': 'Unknown', 'abstract': abstract, 'url': url})
+
+    if not items: # Fallback
+        for a in _PAPER_LINKS(root):
+            href = a.get('href') or ''; url = f"https://huggingface.co{href}" if href.startswith('/') else href
+            title = a.get('title') or _text(a)
+            if title: items.append({'title': title, 'authors': 'Unknown', 'abstract': 'No abstract available.', 'url': url})
+
+    dedup = {f"{it['title']}|{it['url']}": it for it in items}
+    return list(dedup.values())[:50]
+
+HF_PAPERS_API = 'https://huggingface.co/api/papers'
+DEFAULT_PAPER_META = os.path.join(ROOT_DIR, '.cache', 'papers-meta.json')
+# Ids the papers API does not know are asked about again after this long
+PAPER_META_RETRY = 7 * 86400
+PAPER_ABSTRACT_CHARS = 300
+# arXiv-style ids only; list pages also link /papers/trending, /papers/date/..., etc.
+_PAPER_ID = re.compile(r'huggingface\.co/papers/(\d{4}\.\d{4,5})$')
+
+def parse_paper_meta(body: str) -> Dict[str, Any]:
+    """Authors (minus hidden ones) and whitespace-collapsed summary from /api/papers/{id}."""
+    paper = json.loads(body)
+    authors = [a['name'] for a in paper.get('authors') or [] if a.get('name') and not a.get('hidden')]
+    return {'authors': authors, 'summary': ' '.join((paper.get('summary') or '').split())}
+
+class PaperMetaStore:
+    """Paper id -> authors and summary from the papers API, kept across runs in one JSON file.
+
+    A published paper's metadata does not change, so each id is fetched once no matter how
+    many lists (daily, weekly, monthly, trending) or runs it shows up in. Ids the API answers
+    404 for are remembered as missing and retried after PAPER_META_RETRY. Without a path the
+    store only lives for the run, which keeps fixture record/replay runs self-contained.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.papers: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.papers = json.load(f)
+            except (OSError, ValueError):
+                self.papers = {}
+
+    def get(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """The cached entry, or None when the id still has to be fetched."""
+        entry = self.papers.get(paper_id)
+        if entry and entry.get('missing') and time.time() - entry['fetchedAt'] > PAPER_META_RETRY:
+            return None
+        return entry
+
+    def put(self, paper_id: str, meta: Optional[Dict[str, Any]]):
+        entry = dict(meta) if meta is not None else {'missing': True}
+        entry['fetchedAt'] = int(time.time())
+        with self._lock:
+            self.papers[paper_id] = entry
+            self.dirty = True
+
+    def save(self):
+        with self._lock:
+            if not (self.path and self.dirty):
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.papers, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(self.path + '.tmp', self.path)
+            self.dirty = False
+
 class HFPapersScraper(BaseScraper):
-    def _parse_papers(self, html: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html, 'lxml')
-        items = []
-        for article in soup.select('article, div[data-testid="paper-card"], li'):
-            a = article.select_one('a[href^="/papers/"]')
-            if not a: continue
-            href = a.get('href', '')
-            url = f"https://huggingface.co{href}" if href.startswith('/') else href
-            title_node = article.find(['h2', 'h3']) or a.find(['h2', 'h3'])
-            title = (title_node.get_text(strip=True) if title_node else None) or a.get('title') or a.get_text(strip=True)
-            if not title: continue
-            card_text = article.get_text(separator=' ', strip=True)
-            abstract = re.sub(re.escape(title), '', card_text).strip()[:240] if card_text else 'No abstract available.'
-            items.append({'title': title, 'authors': 'Unknown', 'abstract': abstract, 'url': url})
-        
-        if not items: # Fallback
-            for a in soup.select('a[href^="/papers/"]'):
-                href = a.get('href', ''); url = f"https://huggingface.co{href}" if href.startswith('/') else href
-                title = a.get('title') or a.get_text(strip=True)
-                if title: items.append({'title': title, 'authors': 'Unknown', 'abstract': 'No abstract available.', 'url': url})
-        
-        dedup = {f"{it['title']}|{it['url']}": it for it in items}
-        return list(dedup.values())[:50]
+    name = 'papers'
+    cache_ttl = 3600
+    # Metadata requests in flight at once; the HF host budget still applies on top
+    enrich_concurrency = 4
 
-    def run(self):
-        today = date.today()
+    async def arun(self):
+        today = self.engine.today()
         year, week_num, _ = today.isocalendar()
         print(f"Fetching HuggingFace Papers...")
-        payload = {}
         targets = {
             'daily': f"https://huggingface.co/papers/date/{today.strftime('%Y-%m-%d')}",
             'weekly': f"https://huggingface.co/papers/week/{year}-W{week_num:02d}",
             'monthly': f"https://huggingface.co/papers/month/{today.year}-{today.month:02d}",
             'trending': "https://huggingface.co/papers/trending"
         }
-        for key, url in targets.items():
-            try:
-                payload[key] = self._parse_papers(self.get(url))
-                time.sleep(2)
-            except Exception as e:
-                print(f"  Failed {key}: {e}"); payload[key] = []
-        
+        writer = self.writer('huggingface-papers-data.json', {key: [] for key in targets})
+        async for key, papers in self.stream({key: (url, 'papers') for key, url in targets.items()}):
+            if isinstance(papers, Exception):
+                print(f"  Failed {key}: {papers}")
+                continue
+            writer.put((key,), papers)
+        await self.enrich(writer.data)
+
+        payload = writer.data
         payload['lastUpdated'] = datetime.now(timezone.utc).isoformat()
         payload['totals'] = {k: len(v) for k, v in payload.items() if isinstance(v, list)}
-        dest = get_output_path('huggingface-papers-data.json')
-        if sum(payload['totals'].values()) > 0 or not os.path.exists(dest):
-            with open(dest, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, indent=2, ensure_ascii=False)
-        print(f"Saved HuggingFace Papers data. Total: {sum(payload['totals'].values())}")
+        total = sum(payload['totals'].values())
+        writer.save(keep_existing=total == 0)
+        print(f"Saved HuggingFace Papers data. Total: {total}")
+
+    async def enrich(self, sections: Dict[str, List[Dict[str, Any]]]):
+        """Fill authors and abstracts from the papers API, fetching only ids the store lacks."""
+        store = self.engine.papers
+        papers = [paper for section in sections.values() for paper in section]
+        ids = {}
+        for paper in papers:
+            match = _PAPER_ID.search(paper.get('url', ''))
+            if match:
+                ids[id(paper)] = match.group(1)
+        missing = list(dict.fromkeys(pid for pid in ids.values() if store.get(pid) is None))
+        semaphore = asyncio.Semaphore(self.enrich_concurrency)
+
+        async def fetch(paper_id: str):
+            async with semaphore:
+                try:
+                    body = await self.aget(f"{HF_PAPERS_API}/{paper_id}")
+                    # A small JSON document, parsed inline so it stays out of the feed's page/record stats
+                    store.put(paper_id, parse_paper_meta(body))
+                except Exception as e:
+                    if getattr(getattr(e, 'response', None), 'status_code', None) == 404:
+                        store.put(paper_id, None)
+                    print(f"  Failed metadata for paper {paper_id}: {e}")
+
+        await asyncio.gather(*(fetch(paper_id) for paper_id in missing))
+        await self.engine.io(store.save)
+
+        enriched = 0
+        for paper in papers:
+            meta = store.get(ids[id(paper)]) if id(paper) in ids else None
+            if not meta or meta.get('missing'):
+                continue
+            if meta['authors']:
+                paper['authors'] = ', '.join(meta['authors'])
+            if meta['summary']:
+                summary = meta['summary']
+                paper['abstract'] = summary if len(summary) <= PAPER_ABSTRACT_CHARS else summary[:PAPER_ABSTRACT_CHARS - 3] + '...'
+            enriched += 1
+        print(f"  Paper metadata: {len(set(ids.values()))} unique, {len(missing)} fetched, {enriched} papers enriched")
 
 # --- Tophub Focus Scraper ---
 
-class TophubScraper(BaseScraper):
-    def run(self):
-        specs = {
-            'finance': [
-                {'url': 'https://tophub.today/c/finance', 'targets': ['雪球', '华尔街见闻', '集思录']},
-                {'url': 'https://tophub.today/c/finance?&p=3', 'targets': ['格隆汇', '金融界', '慧博投研资讯', '证券日报网', '美股市值']},
-                {'url': 'https://tophub.today/c/finance?&p=4', 'targets': ['同花顺财经']}
-            ],
-            'tech': [
-                {'url': 'https://tophub.today/c/tech', 'targets': ['36氪', '少数派', 'IT之家']},
-                {'url': 'https://tophub.today/c/developer', 'targets': ['人人都是产品经理']},
-                {'url': 'https://tophub.today/c/ai', 'targets': ['量子位']}
-            ],
-            'ai': [
-                {'url': 'https://tophub.today/c/ai', 'targets': ['AIbase', 'AI工具集']},
-                {'url': 'https://tophub.today/c/ai?&p=2', 'targets': ['AIHub']}
-            ]
-        }
-        output = {'savedAt': datetime.now(timezone.utc).isoformat(), 'categories': {}}
-        for cat, page_specs in specs.items():
-            print(f"Fetching Tophub ({cat})...")
-            # Initialize parsed dict with all targets for this category
-            all_targets = []
-            for spec in page_specs:
-                all_targets.extend(spec['targets'])
-            parsed = {t: [] for t in all_targets}
+# Declarative Tophub fetch plan: category -> pages, each page naming the card labels it supplies
+TOPHUB_PLAN = {
+    'finance': [
+        {'url': 'https://tophub.today/c/finance', 'targets': ['雪球', '华尔街见闻', '集思录']},
+        {'url': 'https://tophub.today/c/finance?&p=3', 'targets': ['格隆汇', '金融界', '慧博投研资讯', '证券日报网', '美股市值']},
+        {'url': 'https://tophub.today/c/finance?&p=4', 'targets': ['同花顺财经']}
+    ],
+    'tech': [
+        {'url': 'https://tophub.today/c/tech', 'targets': ['36氪', '少数派', 'IT之家']},
+        {'url': 'https://tophub.today/c/developer', 'targets': ['人人都是产品经理']},
+        {'url': 'https://tophub.today/c/ai', 'targets': ['量子位']}
+    ],
+    'ai': [
+        {'url': 'https://tophub.today/c/ai', 'targets': ['AIbase', 'AI工具集']},
+        {'url': 'https://tophub.today/c/ai?&p=2', 'targets': ['AIHub']}
+    ]
+}
+
+def compile_fetch_plan(plan: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, List[str]]]:
+    """Group a category plan by page URL: {url: {category: [targets]}}, in first-seen order."""
+    compiled: Dict[str, Dict[str, List[str]]] = {}
+    for cat, page_specs in plan.items():
+        for spec in page_specs:
+            compiled.setdefault(spec['url'], {}).setdefault(cat, []).extend(spec['targets'])
+    return compiled
+
+def parse_tophub_cards(html: str) -> List[Dict[str, Any]]:
+    soup = _soup(html)
+    cards = []
+    for card in soup.select('.cc-cd'):
+        label_el = card.select_one('.cc-cd-lb')
+        label = label_el.get_text(strip=True) if label_el else ''
+        s_title_el = card.select_one('.cc-cd-sb-st')
+        s_title = s_title_el.get_text(strip=True) if s_title_el else ''
+        items = []
+        for a in card.select('.cc-cd-cb a[href]'):
+            href = a.get('href', '').strip()
+            if not (href.startswith('http')): continue
+            # Fix malformed URLs like https:https:// found in some sources
+            if href.startswith('https:https://'):
+                href = href.replace('https:https://', 'https://', 1)
+            elif href.startswith('http:http://'):
+                href = href.replace('http:http://', 'http://', 1)
             
-            for spec in page_specs:
-                print(f"  Fetching page: {spec['url']}")
-                html = self.get(spec['url'])
-                soup = BeautifulSoup(html, 'lxml')
-                cards = soup.select('.cc-cd')
-                for card in cards:
-                    label_el = card.select_one('.cc-cd-lb')
-                    label = label_el.get_text(strip=True) if label_el else ''
-                    # Match target if it's in the current page's target list
-                    target = next((t for t in spec['targets'] if t in label), None)
-                    if not target: continue
-                    
-                    s_title_el = card.select_one('.cc-cd-sb-st')
-                    s_title = s_title_el.get_text(strip=True) if s_title_el else ''
-                    items = []
-                    for a in card.select('.cc-cd-cb a[href]'):
-                        href = a.get('href', '').strip()
-                        if not (href.startswith('http')): continue
-                        # Fix malformed URLs like https:https:// found in some sources
-                        if href.startswith('https:https://'):
-                            href = href.replace('https:https://', 'https://', 1)
-                        elif href.startswith('http:http://'):
-                            href = href.replace('http:http://', 'http://', 1)
-                        
-                        row = a.select_one('.cc-cd-cb-ll')
-                        if not row: continue
-                        items.append({
-                            'rank': row.select_one('.s').get_text(strip=True) if row.select_one('.s') else '',
-                            'title': row.select_one('.t').get_text(strip=True) if row.select_one('.t') else '',
-                            'extra': row.select_one('.e').get_text(strip=True) if row.select_one('.e') else '',
-                            'url': href
-                        })
-                    parsed[target].append({'section': s_title, 'items': items})
-                time.sleep(1)
-
-            output['categories'][cat] = {'sourceUrl': page_specs[0]['url'], 'sections': parsed}
-
-        # EastMoney Integration
-        try:
-            print("Fetching EastMoney...")
-            em_html = self.get('https://finance.eastmoney.com/yaowen.html')
-            em_soup = BeautifulSoup(em_html, 'lxml')
-            em_items = []
-            seen = set()
-            for a in em_soup.select('a[href*="/a/"]')[:30]:
-                href = a.get('href', '').strip()
-                title = a.get_text(strip=True)
-                if not title or len(title) < 6 or '查看' in title: continue
-                if href.startswith('/'): href = 'https://finance.eastmoney.com' + href
-                if title not in seen:
-                    seen.add(title)
-                    em_items.append({'rank': '', 'title': title, 'extra': '', 'url': href})
-            output['categories'].setdefault('finance', {}) \
-                  .setdefault('sections', {})['东方财富网'] = [{'section': '焦点要闻', 'items': em_items}]
-        except Exception as e:
-            print(f"  Warning: EastMoney failed: {e}")
+            row = a.select_one('.cc-cd-cb-ll')
+            if not row: continue
+            items.append({
+                'rank': row.select_one('.s').get_text(strip=True) if row.select_one('.s') else '',
+                'title': row.select_one('.t').get_text(strip=True) if row.select_one('.t') else '',
+                'extra': row.select_one('.e').get_text(strip=True) if row.select_one('.e') else '',
+                'url': href
+            })
+        cards.append({'label': label, 'section': s_title, 'items': items})
+    return cards
 
-        # AI精选 Integration
-        try:
-            print("Fetching AI精选 (RSS)...")
-            feed_xml = self.get('https://aihot.virxact.com/feed.xml')
-            feed_soup = BeautifulSoup(feed_xml, 'xml')
-            ai_items = []
-            for item in feed_soup.find_all('item')[:30]:
-                title = item.find('title')
-                link = item.find('link')
-                desc = item.find('description')
-                
-                title_txt = title.get_text(strip=True) if title else ''
-                link_txt = link.get_text(strip=True) if link else ''
-                desc_txt = desc.get_text(strip=True) if desc else ''
-                
-                if title_txt and link_txt:
-                    clean_desc = BeautifulSoup(desc_txt, 'lxml').get_text(strip=True) if desc_txt else ''
-                    if len(clean_desc) > 100:
-                        clean_desc = clean_desc[:97] + '...'
-                    
-                    ai_items.append({
-                        'rank': '',
-                        'title': title_txt,
-                        'extra': clean_desc,
-                        'url': link_txt
-                    })
-            output['categories'].setdefault('ai', {}) \
-                  .setdefault('sections', {})['AI精选'] = [{'section': '最新精选', 'items': ai_items}]
-        except Exception as e:
-            print(f"  Warning: AI精选 failed: {e}")
+def parse_eastmoney(html: str) -> List[Dict[str, Any]]:
+    em_soup = _soup(html)
+    em_items = []
+    seen = set()
+    for a in em_soup.select('a[href*="/a/"]')[:30]:
+        href = a.get('href', '').strip()
+        title = a.get_text(strip=True)
+        if not title or len(title) < 6 or '查看' in title: continue
+        if href.startswith('/'): href = 'https://finance.eastmoney.com' + href
+        if title not in seen:
+            seen.add(title)
+            em_items.append({'rank': '', 'title': title, 'extra': '', 'url': href})
+    return em_items
+
+def parse_aihot_feed(feed_xml: str) -> List[Dict[str, Any]]:
+    feed_soup = _soup(feed_xml, 'xml')
+    ai_items = []
+    for item in feed_soup.find_all('item')[:30]:
+        title = item.find('title')
+        link = item.find('link')
+        desc = item.find('description')
+        
+        title_txt = title.get_text(strip=True) if title else ''
+        link_txt = link.get_text(strip=True) if link else ''
+        desc_txt = desc.get_text(strip=True) if desc else ''
+        
+        if title_txt and link_txt:
+            clean_desc = _soup(desc_txt).get_text(strip=True) if desc_txt else ''
+            if len(clean_desc) > 100:
+                clean_desc = clean_desc[:97] + '...'
+            
+            ai_items.append({
+                'rank': '',
+                'title': title_txt,
+                'extra': clean_desc,
+                'url': link_txt
+            })
+    return ai_items
+
+_TH_CARDS = _XPath(f"//*[{_cls('cc-cd')}]")
+_TH_LABEL = _XPath(f"(.//*[{_cls('cc-cd-lb')}])[1]")
+_TH_SUBTITLE = _XPath(f"(.//*[{_cls('cc-cd-sb-st')}])[1]")
+_TH_LINKS = _XPath(f".//*[{_cls('cc-cd-cb')}]//a[@href]")
+_TH_ROW = _XPath(f"(.//*[{_cls('cc-cd-cb-ll')}])[1]")
+_TH_FIELDS = {key: _XPath(f"(.//*[{_cls(cls)}])[1]") for key, cls in (('rank', 's'), ('title', 't'), ('extra', 'e'))}
+_EM_LINKS = _XPath('//a[contains(@href, "/a/")]')
+_RSS_ITEMS = _XPath('//*[local-name() = "item"]')
+_RSS_FIELDS = {key: _XPath(f'(.//*[local-name() = "{key}"])[1]') for key in ('title', 'link', 'description')}
+
+def parse_tophub_cards_lxml(html: str) -> List[Dict[str, Any]]:
+    cards = []
+    for card in _TH_CARDS(_html_root(html)):
+        label_el = _first(_TH_LABEL(card))
+        s_title_el = _first(_TH_SUBTITLE(card))
+        items = []
+        for a in _TH_LINKS(card):
+            href = a.get('href').strip()
+            if not (href.startswith('http')): continue
+            # Fix malformed URLs like https:https:// found in some sources
+            if href.startswith('https:https://'):
+                href = href.replace('https:https://', 'https://', 1)
+            elif href.startswith('http:http://'):
+                href = href.replace('http:http://', 'http://', 1)
+
+            row = _first(_TH_ROW(a))
+            if row is None: continue
+            item = {}
+            for key, xpath in _TH_FIELDS.items():
+                el = _first(xpath(row))
+                item[key] = _text(el) if el is not None else ''
+            item['url'] = href
+            items.append(item)
+        cards.append({
+            'label': _text(label_el) if label_el is not None else '',
+            'section': _text(s_title_el) if s_title_el is not None else '',
+            'items': items
+        })
+    return cards
+
+def parse_eastmoney_lxml(html: str) -> List[Dict[str, Any]]:
+    em_items = []
+    seen = set()
+    for a in _EM_LINKS(_html_root(html))[:30]:
+        href = (a.get('href') or '').strip()
+        title = _text(a)
+        if not title or len(title) < 6 or '查看' in title: continue
+        if href.startswith('/'): href = 'https://finance.eastmoney.com' + href
+        if title not in seen:
+            seen.add(title)
+            em_items.append({'rank': '', 'title': title, 'extra': '', 'url': href})
+    return em_items
+
+def parse_aihot_feed_lxml(feed_xml: str) -> List[Dict[str, Any]]:
+    # lxml refuses str input that carries an encoding declaration; the body is already decoded
+    feed_xml = re.sub(r'^\s*<\?xml[^>]*\?>', '', feed_xml)
+    etree = _etree()
+    root = etree.fromstring(feed_xml, etree.XMLParser(recover=True)) if feed_xml.strip() else None
+    ai_items = []
+    for item in (_RSS_ITEMS(root) if root is not None else [])[:30]:
+        fields = {}
+        for key, xpath in _RSS_FIELDS.items():
+            el = _first(xpath(item))
+            fields[key] = _text(el) if el is not None else ''
 
-        with open(get_output_path('realtime-focus.json'), 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        if fields['title'] and fields['link']:
+            clean_desc = _text(_html_root(fields['description'])) if fields['description'] else ''
+            if len(clean_desc) > 100:
+                clean_desc = clean_desc[:97] + '...'
+
+            ai_items.append({
+                'rank': '',
+                'title': fields['title'],
+                'extra': clean_desc,
+                'url': fields['link']
+            })
+    return ai_items
+
+class TophubScraper(BaseScraper):
+    name = 'focus'
+    # Hot lists move quickly: always revalidate
+    cache_ttl = 0
+    # Single-source jobs and the feed section each one fills
+    SOURCE_SECTIONS = {
+        'eastmoney': ('categories', 'finance', 'sections', '东方财富网'),
+        'aihot': ('categories', 'ai', 'sections', 'AI精选'),
+    }
+
+    def section_paths(self, key: Any) -> List[tuple]:
+        if key in self.SOURCE_SECTIONS:
+            return [self.SOURCE_SECTIONS[key]]
+        return [('categories', cat, 'sections', target) for cat, wanted in compile_fetch_plan(TOPHUB_PLAN)[key].items() for target in wanted]
+
+    async def arun(self):
+        plan = compile_fetch_plan(TOPHUB_PLAN)
+        print(f"Fetching Tophub ({len(plan)} pages for {', '.join(TOPHUB_PLAN)}), EastMoney and AI精选 (RSS)...")
+        jobs = {url: (url, 'tophub') for url in plan}
+        jobs['eastmoney'] = ('https://finance.eastmoney.com/yaowen.html', 'eastmoney')
+        jobs['aihot'] = ('https://aihot.virxact.com/feed.xml', 'aihot')
+        writer = self.writer('realtime-focus.json', {
+            'savedAt': datetime.now(timezone.utc).isoformat(),
+            'categories': {
+                cat: {'sourceUrl': page_specs[0]['url'], 'sections': {t: [] for spec in page_specs for t in spec['targets']}}
+                for cat, page_specs in TOPHUB_PLAN.items()
+            }
+        })
+
+        async for key, result in self.stream(jobs):
+            if key == 'eastmoney':
+                if isinstance(result, Exception):
+                    print(f"  Warning: EastMoney failed: {result}")
+                else:
+                    writer.put(self.SOURCE_SECTIONS['eastmoney'], [{'section': '焦点要闻', 'items': result}])
+            elif key == 'aihot':
+                if isinstance(result, Exception):
+                    print(f"  Warning: AI精选 failed: {result}")
+                else:
+                    writer.put(self.SOURCE_SECTIONS['aihot'], [{'section': '最新精选', 'items': result}])
+            else:
+                if isinstance(result, Exception):
+                    raise result
+                # Each page is parsed once; fan its cards out to every category that wants them
+                for cat, wanted in plan[key].items():
+                    for card in result:
+                        target = next((t for t in wanted if t in card['label']), None)
+                        if target:
+                            writer.extend(('categories', cat, 'sections', target), [{'section': card['section'], 'items': card['items']}])
+
+        writer.save()
         print("Saved Tophub Focus data.")
 
+# --- Parser Registry ---
+
+# parser name -> backend -> function(body, *args); HF API responses are JSON for both backends
+PARSERS = {
+    'github': {'bs4': parse_github_trending, 'lxml': parse_github_trending_lxml},
+    'hf_models': {'bs4': parse_hf_models, 'lxml': parse_hf_models},
+    'papers': {'bs4': parse_hf_papers, 'lxml': parse_hf_papers_lxml},
+    'tophub': {'bs4': parse_tophub_cards, 'lxml': parse_tophub_cards_lxml},
+    'eastmoney': {'bs4': parse_eastmoney, 'lxml': parse_eastmoney_lxml},
+    'aihot': {'bs4': parse_aihot_feed, 'lxml': parse_aihot_feed_lxml},
+}
+
+# --- Local Feed Server ---
+
+class FeedServer:
+    """Serves the site for local development, answering /feeds/ from memory.
+
+    Feed files are loaded once per refresh together with a strong ETag and compressed
+    bodies (the .gz/.br siblings when present), so page reloads cost a 304 or a memcpy.
+    Everything else is served from the site directory as plain static files, except dot-paths.
+    """
+    def __init__(self, feeds_dir: str, site_dir: str = ROOT_DIR):
+        self.feeds_dir = feeds_dir
+        self.site_dir = site_dir
+        # path under /feeds/ -> {'mtime', 'etag', 'identity', 'gzip', 'br'?}
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    def reload(self) -> int:
+        """Pick up new or changed feed files; returns how many were (re)loaded."""
+        files, loaded = {}, 0
+        for dirpath, _, names in os.walk(self.feeds_dir):
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.feeds_dir).replace(os.sep, '/')
+                mtime = os.stat(path).st_mtime_ns
+                known = self.files.get(rel)
+                if known and known['mtime'] == mtime:
+                    files[rel] = known
+                    continue
+                with open(path, 'rb') as f:
+                    body = f.read()
+                entry = {'mtime': mtime, 'etag': f'"{hashlib.sha256(body).hexdigest()[:16]}"', 'identity': body}
+                for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+                    if os.path.exists(path + suffix):
+                        with open(path + suffix, 'rb') as f:
+                            entry[encoding] = f.read()
+                entry.setdefault('gzip', gzip.compress(body, compresslevel=6, mtime=0))
+                files[rel] = entry
+                loaded += 1
+        # Handler threads read self.files; swapping in a new dict keeps every response consistent
+        self.files = files
+        return loaded
+
+    def respond(self, handler: http.server.BaseHTTPRequestHandler, head: bool = False) -> bool:
+        path = urlparse(handler.path).path
+        entry = self.files.get(path[len('/feeds/'):]) if path.startswith('/feeds/') else None
+        if entry is None:
+            return False
+        if handler.headers.get('If-None-Match') == entry['etag']:
+            handler.send_response(304)
+            handler.send_header('ETag', entry['etag'])
+            handler.end_headers()
+            return True
+        accepted = {token.split(';')[0].strip() for token in handler.headers.get('Accept-Encoding', '').split(',')}
+        encoding = next((e for e in ('br', 'gzip') if e in accepted and e in entry), None)
+        body = entry[encoding] if encoding else entry['identity']
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('ETag', entry['etag'])
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            handler.send_header('Content-Encoding', encoding)
+        handler.end_headers()
+        if not head:
+            handler.wfile.write(body)
+        return True
+
+    def handler(self):
+        feeds = self
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=feeds.site_dir, **kwargs)
+
+            def do_GET(self):
+                if not feeds.respond(self):
+                    super().do_GET()
+
+            def do_HEAD(self):
+                if not feeds.respond(self, head=True):
+                    super().do_HEAD()
+
+            def send_head(self):
+                # The site directory is the repo root: keep .git, .cache and other dot-paths private
+                if any(part.startswith('.') for part in unquote(urlparse(self.path).path).split('/')):
+                    self.send_error(404)
+                    return None
+                return super().send_head()
+
+            def log_message(self, format, *args):
+                pass
+        return Handler
+
 # --- CLI Entry Point ---
 
+SCRAPERS = {
+    'github': GitHubTrendingScraper,
+    'huggingface': HuggingFaceScraper,
+    'papers': HFPapersScraper,
+    'focus': TophubScraper,
+    'interest': HuggingFaceInterestScraper
+}
+
+async def run_all(scrapers: Dict[str, BaseScraper]):
+    # HF feeds render only once every HF list of the run has merged into the shared model table
+    engine = next(iter(scrapers.values())).engine
+    engine.models.expect(s.name for s in scrapers.values() if s.merges_models)
+
+    async def run_one(name: str, scraper: BaseScraper):
+        try:
+            await scraper.execute()
+            print(f"Successfully completed: {name}")
+        except Exception as e:
+            print(f"Critical error in {name}: {e}")
+        finally:
+            engine.models.release(scraper.name)
+    await asyncio.gather(*(run_one(name, scraper) for name, scraper in scrapers.items()))
+
+def _load_stable(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {k: v for k, v in data.items() if k not in VOLATILE_KEYS} if isinstance(data, dict) else data
+
+def run_benchmarks(fixtures_dir: str, golden_dir: Optional[str] = None, update_golden: bool = False,
+                   parse_backend: str = 'lxml') -> bool:
+    """Replay recorded fixtures through every scraper, report per-stage timings and check golden files.
+
+    Parsing runs in-process so that parse time and peak memory are attributed to the scraper
+    being measured; tracemalloc only sees Python allocations, not libxml2's own buffers.
+    "fetch" is summed over concurrent requests. Returns False if a scraper fails or an output drifts.
+    """
+    store = FixtureStore(fixtures_dir)
+    if not store.index['responses']:
+        print(f"No fixtures in {fixtures_dir}; record some first with --record {fixtures_dir}")
+        return False
+    golden_dir = golden_dir or os.path.join(fixtures_dir, 'golden')
+    unthrottled = (1e6, 1000, 64)
+    ok = True
+    rows = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, cls in SCRAPERS.items():
+            engine = FetchEngine(host_limits={host: unthrottled for host in HOST_LIMITS}, default_limit=unthrottled,
+                                 parse_workers=0, parse_backend=parse_backend, adapter=ReplayAdapter(store),
+                                 output_dir=out_dir, today=store.recorded_on)
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                cls(engine=engine).run()
+            except Exception as e:
+                print(f"Critical error in {name}: {e}")
+                ok = False
+            wall = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            golden = 'n/a'
+            for path in engine.outputs.get(name, []):
+                # v1 and v2 files share names, so goldens mirror the output layout (v2/ included)
+                rel = os.path.relpath(path, out_dir)
+                golden_path = os.path.join(golden_dir, rel)
+                if update_golden:
+                    os.makedirs(os.path.dirname(golden_path), exist_ok=True)
+                    with open(path, 'rb') as src, open(golden_path, 'wb') as dst:
+                        dst.write(src.read())
+                    golden = 'updated'
+                elif os.path.exists(golden_path):
+                    same = _load_stable(path) == _load_stable(golden_path)
+                    golden = 'ok' if same and golden != 'DIFF' else 'DIFF'
+                    ok = ok and same
+                else:
+                    print(f"  No golden for {rel}; create it with --update-golden")
+            st = engine.stats.get(name, {})
+            records = int(st.get('records', 0))
+            rows.append((name, wall, st.get('fetch', 0.0), st.get('parse', 0.0), st.get('serialize', 0.0),
+                         peak / 1e6, records, records / wall if wall else 0.0, golden))
+
+    print(f"\nBenchmark ({parse_backend}, fixtures recorded {store.index.get('recordedOn')}):")
+    print(f"{'scraper':<12}{'wall s':>9}{'fetch s':>9}{'parse s':>9}{'write s':>9}{'peak MB':>9}{'records':>9}{'rec/s':>10}  golden")
+    for name, wall, fetch, parse, write, peak_mb, records, rate, golden in rows:
+        print(f"{name:<12}{wall:>9.3f}{fetch:>9.3f}{parse:>9.3f}{write:>9.3f}{peak_mb:>9.1f}{records:>9}{rate:>10.0f}  {golden}")
+    return ok
+
+def write_run_report(engine: FetchEngine, target: str, metrics_file: Optional[str] = None, path: Optional[str] = None):
+    """Write feeds/_run-report.json (or path) and, if requested, a Prometheus text file."""
+    report = engine.metrics.build_report(engine, target)
+    with open(path or get_output_path('_run-report.json', engine.output_dir), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if metrics_file:
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            f.write(RunMetrics.to_prometheus(report))
+    slowest = max(report['hosts'].items(), key=lambda kv: kv[1]['latencyMs']['max'], default=None)
+    if slowest:
+        print(f"Run report: {len(report['requests'])} requests in {report['durationSeconds']}s, "
+              f"slowest host {slowest[0]} (max {slowest[1]['latencyMs']['max']:.0f} ms)")
+
+def finish_run(engine: FetchEngine, target: str, metrics_file: Optional[str] = None,
+               search: Optional[SearchIndex] = None):
+    """End-of-run bookkeeping: search index, run report, parse timings, cache eviction, history compaction."""
+    if search and 'v1' in engine.output_formats:
+        started = time.perf_counter()
+        built = search.build()
+        print(f"Search index: {built['docs']} docs, {built['terms']} terms ({built['retokenized']} items re-tokenized, "
+              f"{built['removed']} removed); {built['rewritten']}/{built['files']} files rewritten "
+              f"in {time.perf_counter() - started:.2f}s")
+    write_run_report(engine, target, metrics_file)
+    print(engine.parse_report())
+    if engine.cache:
+        engine.cache.evict()
+        print(engine.cache.report())
+    if engine.history:
+        removed = engine.history.compact()
+        print(f"History: {engine.history.rows} observations appended, {removed} old rows downsampled ({engine.history.path})")
+
+def serve(engine: FetchEngine, scrapers: Dict[str, BaseScraper], host: str, port: int,
+          refresh_minutes: float, schedule_dir: str, metrics_file: Optional[str] = None,
+          search: Optional[SearchIndex] = None):
+    """Keep the scrapers warm in this process, refresh on a timer and serve the site locally.
+
+    Each refresh is a scheduled run (see RefreshSchedule) over the shared engine, so
+    keep-alive connections and the parse pool outlive it and only due sections are fetched.
+    """
+    feeds = FeedServer(engine.output_dir or os.path.join(ROOT_DIR, 'feeds'))
+    feeds.reload()
+    httpd = http.server.ThreadingHTTPServer((host, port), feeds.handler())
+    stop = threading.Event()
+
+    def refresh_loop():
+        while not stop.is_set():
+            engine.begin_run()
+            engine.schedule = RefreshSchedule(schedule_dir)
+            try:
+                asyncio.run(run_all(scrapers))
+            except Exception as e:
+                print(f"Refresh failed: {e}")
+            finish_run(engine, 'serve', metrics_file, search)
+            print(f"Loaded {feeds.reload()} changed feed files; next refresh in {refresh_minutes:g} min")
+            stop.wait(refresh_minutes * 60)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+    # Stop the same way on SIGTERM (service managers, docker stop) as on Ctrl-C
+    signal.signal(signal.SIGTERM, terminate)
+    refresher = threading.Thread(target=refresh_loop, name='refresh', daemon=True)
+    refresher.start()
+    print(f"Serving {feeds.site_dir} on http://{host}:{port}/ (feeds from memory)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping after the current refresh...")
+    finally:
+        # Service managers and process-group kills may repeat SIGTERM; it must not interrupt the cleanup
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        stop.set()
+        httpd.server_close()
+        refresher.join()
+
+def run_history_query(history: HistoryStore, args) -> List[Dict[str, Any]]:
+    if args.query == 'first-seen':
+        return history.first_seen(args.source, args.days, args.limit)
+    if not args.source:
+        raise ValueError(f"'{args.query}' needs --source")
+    if args.query == 'velocity':
+        return history.velocity(args.source, args.metric, args.days, args.entity, args.limit, args.section)
+    return history.rank_change(args.source, args.days, args.section, args.limit)
+
+def print_rows(rows: List[Dict[str, Any]]):
+    if not rows:
+        print("No matching history.")
+        return
+    cells = [[str(v) if v is not None else '-' for v in row.values()] for row in rows]
+    widths = [max(len(k), *(len(c[i]) for c in cells)) for i, k in enumerate(rows[0])]
+    print('  '.join(k.ljust(w) for k, w in zip(rows[0], widths)))
+    for c in cells:
+        print('  '.join(v.ljust(w) for v, w in zip(c, widths)))
+
 def main():
     parser = argparse.ArgumentParser(description="Asstar Data Fetcher")
-    parser.add_argument('target', choices=['github', 'huggingface', 'papers', 'focus', 'interest', 'all'], help="Target data to fetch")
+    parser.add_argument('target', choices=['github', 'huggingface', 'papers', 'focus', 'interest', 'all', 'bench', 'history', 'serve', 'hf-deep'],
+                        help="Target data to fetch ('bench' replays fixtures, 'history' queries the history store, "
+                             "'serve' refreshes on a timer and serves the site locally, 'hf-deep' crawls full HF lists)")
+    parser.add_argument('--parse-workers', type=int, default=None, help="Parser processes (0 parses in-process)")
+    parser.add_argument('--parser', choices=['lxml', 'bs4'], default='lxml', help="HTML extraction backend")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the on-disk HTTP response cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Directory for the HTTP response cache")
+    parser.add_argument('--output-dir', default=None, help="Write feeds here instead of feeds/")
+    parser.add_argument('--formats', default='v1,v2', help="Comma-separated output formats: v1 (pretty JSON), v2 (typed, minified, precompressed)")
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument('--record', metavar='DIR', help="Save every response into a fixture directory")
+    fixtures.add_argument('--replay', metavar='DIR', help="Serve responses from a fixture directory instead of the network")
+    parser.add_argument('--golden', metavar='DIR', help="Golden feed files for 'bench' (default: <fixtures>/golden)")
+    parser.add_argument('--update-golden', action='store_true', help="Overwrite the golden files with this run's output")
+    parser.add_argument('--metrics-file', metavar='PATH', help="Also write run metrics in Prometheus text format")
+    parser.add_argument('--profile', metavar='DIR', help="Write cProfile and sampled stack output for this run")
+    parser.add_argument('--schedule', action='store_true', help="Refetch only the sections due per REFRESH_INTERVALS; reuse the rest")
+    parser.add_argument('--schedule-dir', default=DEFAULT_SCHEDULE_DIR, help="Directory for the per-source refresh state")
+    parser.add_argument('--host', default='127.0.0.1', help="Address for 'serve'")
+    parser.add_argument('--port', type=int, default=8000, help="Port for 'serve'")
+    parser.add_argument('--refresh-minutes', type=float, default=30, help="Minutes between refreshes for 'serve'")
+    parser.add_argument('--deep-dir', default=DEFAULT_DEEP_DIR, help="Output directory for 'hf-deep' shards and cursors")
+    parser.add_argument('--deep-limit', type=int, default=5000, help="Models to crawl per list for 'hf-deep'")
+    parser.add_argument('--deep-concurrency', type=int, default=4, help="Lists crawled at once by 'hf-deep'")
+    parser.add_argument('--shard-size', type=int, default=1000, help="Records per NDJSON shard for 'hf-deep'")
+    parser.add_argument('--deep-restart', action='store_true', help="Discard saved 'hf-deep' cursors and start over")
+    parser.add_argument('--search-state', help="Per-item token cache for incremental search index builds "
+                        f"(default {os.path.relpath(DEFAULT_SEARCH_STATE, ROOT_DIR)}; in memory only for --replay/--output-dir runs)")
+    parser.add_argument('--no-search-index', action='store_true', help="Do not rebuild feeds/search/ after fetching")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB, help="SQLite file every run appends its feed items to")
+    parser.add_argument('--no-history', action='store_true', help="Do not append this run to the history store")
+    parser.add_argument('--papers-meta', default=DEFAULT_PAPER_META, help="JSON file caching per-paper authors and summaries across runs")
+    history_query = parser.add_argument_group("history queries")
+    history_query.add_argument('--query', choices=['velocity', 'rank-change', 'first-seen'], default='velocity')
+    history_query.add_argument('--source', choices=list(SCRAPERS), help="Scraper whose history to query")
+    history_query.add_argument('--entity', help="Item URL (or name) to restrict 'velocity' to")
+    history_query.add_argument('--section', help="Section pointer such as /daily for 'rank-change' and 'velocity'")
+    history_query.add_argument('--metric', choices=HISTORY_METRICS, default='stars', help="Field for 'velocity'")
+    history_query.add_argument('--days', type=int, default=30, help="Query window in days")
+    history_query.add_argument('--limit', type=int, default=20, help="Maximum rows to print")
     args = parser.parse_args()
 
-    scrapers = {
-        'github': GitHubTrendingScraper(),
-        'huggingface': HuggingFaceScraper(),
-        'papers': HFPapersScraper(),
-        'focus': TophubScraper(),
-        'interest': HuggingFaceInterestScraper()
-    }
+    if args.target == 'history':
+        history = HistoryStore(args.history_db)
+        try:
+            print_rows(run_history_query(history, args))
+        except ValueError as e:
+            parser.error(str(e))
+        finally:
+            history.close()
+        return
 
-    if args.target == 'all':
-        print(f"Starting parallel fetch for all {len(scrapers)} targets...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
-            future_to_name = {executor.submit(scraper.run): name for name, scraper in scrapers.items()}
-            for future in concurrent.futures.as_completed(future_to_name):
-                name = future_to_name[future]
-                try:
-                    future.result()
-                    print(f"Successfully completed: {name}")
-                except Exception as e:
-                    print(f"Critical error in {name}: {e}")
-        print("All fetch operations completed.")
-    else:
-        scrapers[args.target].run()
+    if args.target == 'bench':
+        if not args.replay:
+            parser.error("'bench' needs --replay DIR")
+        sys.exit(0 if run_benchmarks(args.replay, args.golden, args.update_golden, args.parser) else 1)
+
+    adapter, today = None, None
+    if args.record:
+        adapter = RecordingAdapter(FixtureStore(args.record))
+    elif args.replay:
+        store = FixtureStore(args.replay)
+        adapter, today = ReplayAdapter(store), store.recorded_on
+    # Recording must see real responses, and replay should not be masked by the cache
+    cache = None if args.no_cache or adapter else ResponseCache(args.cache_dir)
+    # Replayed fixtures are not real observations, and hf-deep writes no feeds to record
+    history = None if args.no_history or args.replay or args.target == 'hf-deep' else HistoryStore(args.history_db)
+    # Fixture runs must fetch paper metadata through the adapter, not from earlier live runs
+    papers = PaperMetaStore(None if adapter else args.papers_meta)
+    # One engine for the whole run so per-host budgets hold across scrapers
+    engine = FetchEngine(cache=cache, parse_workers=args.parse_workers, parse_backend=args.parser,
+                         adapter=adapter, output_dir=args.output_dir, today=today,
+                         output_formats=tuple(f.strip() for f in args.formats.split(',') if f.strip()),
+                         history=history, schedule=RefreshSchedule(args.schedule_dir) if args.schedule else None,
+                         papers=papers)
+    scrapers = {name: cls(engine=engine) for name, cls in SCRAPERS.items()}
+    # Replays and --output-dir runs index other feeds than the default state describes
+    search_state = args.search_state or (None if args.replay or args.output_dir else DEFAULT_SEARCH_STATE)
+    feeds_dir = args.output_dir or os.path.join(ROOT_DIR, 'feeds')
+    search = None if args.no_search_index or args.target == 'hf-deep' else SearchIndex(feeds_dir, search_state)
+
+    if args.target == 'serve':
+        try:
+            serve(engine, scrapers, args.host, args.port, args.refresh_minutes, args.schedule_dir, args.metrics_file, search)
+        finally:
+            engine.close()
+            if history:
+                history.close()
+        return
+
+    try:
+        with RunProfiler(args.profile) if args.profile else contextlib.nullcontext():
+            if args.target == 'all':
+                print(f"Starting parallel fetch for all {len(scrapers)} targets...")
+                asyncio.run(run_all(scrapers))
+                print("All fetch operations completed.")
+            elif args.target == 'hf-deep':
+                HFDeepCrawler(args.deep_dir, args.deep_limit, args.deep_concurrency, args.shard_size,
+                              args.deep_restart, engine=engine).run()
+            else:
+                scrapers[args.target].run()
+    finally:
+        engine.close()
+        if args.target == 'hf-deep':
+            # The crawl writes no feeds: its report goes next to the shards and feed-side state is left alone
+            os.makedirs(args.deep_dir, exist_ok=True)
+            write_run_report(engine, args.target, args.metrics_file, os.path.join(args.deep_dir, 'run-report.json'))
+            print(engine.parse_report())
+        else:
+            finish_run(engine, args.target, args.metrics_file, search)
+        if history:
+            history.close()
 
 if __name__ == "__main__":
     main()